@@ -0,0 +1,301 @@
+import base64
+import json
+import os
+import time
+from urllib.parse import parse_qsl, quote_plus, urlencode, urljoin, urlsplit, urlunsplit
+
+from extract import Listing
+from output import atomic_write
+
+# Keys that hold a job's title, location and link in common job board APIs
+TITLE_KEYS = ('title', 'jobTitle', 'job_title', 'name', 'position', 'text')
+LOCATION_KEYS = ('location', 'locations', 'locationName', 'location_name', 'city', 'office', 'offices', 'categories')
+URL_KEYS = ('url', 'absolute_url', 'applyUrl', 'apply_url', 'jobUrl', 'job_url', 'hostedUrl', 'link', 'href')
+
+# Query parameters that page through results
+PAGE_PARAMS = ('page', 'p', 'pageNumber', 'page_number')
+OFFSET_PARAMS = ('offset', 'start', 'from', 'skip')
+# Response keys with the URL (or cursor) of the next page, at the top level or under these containers
+NEXT_KEYS = ('next', 'nextUrl', 'next_url', 'next_page_url', 'nextPage', 'nextCursor', 'next_cursor', 'cursor')
+NEXT_CONTAINERS = ('links', 'meta', 'pagination', 'paging', 'page_info', 'pageInfo')
+TOTAL_KEYS = ('total', 'totalCount', 'total_count', 'count', 'totalResults', 'total_results')
+
+# Request headers worth replaying; credentials are never stored
+REPLAYED_HEADERS = ('accept',)
+SECRET_HEADER_WORDS = ('auth', 'token', 'cookie', 'csrf', 'session', 'key')
+
+MAX_PAGES = 50
+
+
+def find_job_records(data, path=()):
+    """Find the largest list of job-like objects in decoded JSON, returning (path, records) or None
+
+    A list is job-like if most of its items are objects with a title key.
+    """
+    best = None
+    if isinstance(data, list):
+        objects = [item for item in data if isinstance(item, dict)]
+        titled = sum(1 for item in objects if _first_key(item, TITLE_KEYS))
+        if objects and titled * 2 >= len(data):
+            best = (path, data)
+        children = enumerate(data) if not best else ()
+    elif isinstance(data, dict):
+        children = data.items()
+    else:
+        return None
+
+    for key, value in children:
+        found = find_job_records(value, path + (key,))
+        if found and (best is None or len(found[1]) > len(best[1])):
+            best = found
+    return best
+
+
+def _first_key(record, keys):
+    for key in keys:
+        if record.get(key) not in (None, '', []):
+            return key
+    return None
+
+
+def field_mapping(records):
+    """The keys the records use for title, location and URL, by majority vote"""
+    mapping = {}
+    for field, keys in (('title', TITLE_KEYS), ('location', LOCATION_KEYS), ('url', URL_KEYS)):
+        votes = {}
+        for record in records:
+            key = _first_key(record, keys) if isinstance(record, dict) else None
+            if key:
+                votes[key] = votes.get(key, 0) + 1
+        mapping[field] = max(votes, key=votes.get) if votes else None
+    return mapping
+
+
+def _text(value):
+    """Display text of a JSON field that may be a string, an object or a list of either"""
+    if value is None:
+        return None
+    if isinstance(value, list):
+        parts = [_text(item) for item in value]
+        return ', '.join(part for part in parts if part) or None
+    if isinstance(value, dict):
+        for key in ('name', 'title', 'city', 'location', 'text', 'label'):
+            if value.get(key):
+                return _text(value[key])
+        return None
+    text = str(value).strip()
+    return text or None
+
+
+def _lookup(data, path):
+    for key in path:
+        try:
+            data = data[key]
+        except (KeyError, IndexError, TypeError):
+            return None
+    return data
+
+
+def endpoint_spec(url, company, path, records, headers=None):
+    """Describe a captured JSON endpoint so it can be called directly for any company
+
+    Path segments and query values that are exactly the company slug become
+    a {company} placeholder; the host and other text that merely contains
+    the slug are kept as they are. Returns None if no segment or value is
+    the slug, since the URL could not be reused for other companies.
+    """
+    parts = urlsplit(url)
+    segments = parts.path.split('/')
+    query = parse_qsl(parts.query, keep_blank_values=True)
+    if company not in segments and company not in (value for _, value in query):
+        return None
+    pagination = None
+    for name, value in query:
+        if name in PAGE_PARAMS and value.isdigit():
+            pagination = {'kind': 'page', 'param': name}
+        elif name in OFFSET_PARAMS and value.isdigit():
+            pagination = {'kind': 'offset', 'param': name}
+
+    # Start from the first page, whatever page the browser happened to request
+    if pagination:
+        first = '1' if pagination['kind'] == 'page' else '0'
+        query = [(name, first if name == pagination['param'] else value) for name, value in query]
+    template_path = '/'.join('{company}' if segment == company else segment for segment in segments)
+    # Encoded pair by pair, so the placeholder's braces are not escaped
+    template_query = '&'.join(f"{quote_plus(name)}={{company}}" if value == company else urlencode([(name, value)])
+                              for name, value in query)
+    template = urlunsplit(parts._replace(path=template_path, query=template_query))
+
+    return {
+        'template': template,
+        'records_path': list(path),
+        'fields': field_mapping(records),
+        'pagination': pagination,
+        'headers': {name: value for name, value in (headers or {}).items()
+                    if (name.lower() in REPLAYED_HEADERS or name.lower().startswith('x-'))
+                    and not any(word in name.lower() for word in SECRET_HEADER_WORDS)}
+    }
+
+
+def capture_endpoints(driver, company):
+    """Endpoint specs of the JSON responses with job records in the driver's performance log
+
+    The driver needs performance logging enabled (see
+    A16zJobsScraper(capture_network=True)); reading the log drains it.
+    """
+    requests = {}
+    responses = []
+    for entry in driver.get_log('performance'):
+        message = json.loads(entry['message'])['message']
+        params = message.get('params', {})
+        if message['method'] == 'Network.requestWillBeSent':
+            requests[params['requestId']] = params['request']
+        elif message['method'] == 'Network.responseReceived' and params.get('type') in ('XHR', 'Fetch'):
+            if 'json' in params['response'].get('mimeType', ''):
+                responses.append(params)
+
+    specs = []
+    for params in responses:
+        request = requests.get(params['requestId'], {})
+        if request.get('method', 'GET') != 'GET':
+            continue
+        try:
+            body = driver.execute_cdp_cmd('Network.getResponseBody', {'requestId': params['requestId']})
+            text = base64.b64decode(body['body']).decode('utf-8') if body.get('base64Encoded') else body['body']
+            data = json.loads(text)
+        except Exception as e:
+            print(f"  Could not read {params['response']['url']}: {e}")
+            continue
+
+        found = find_job_records(data)
+        if found and found[1]:
+            spec = endpoint_spec(params['response']['url'], company, found[0], found[1], request.get('headers'))
+            if spec and spec['fields']['title']:
+                specs.append((len(found[1]), spec))
+
+    specs.sort(key=lambda item: item[0], reverse=True)
+    return [spec for _, spec in specs]
+
+
+class ApiSpec:
+    """The job board's JSON endpoints found by discovery, persisted between runs"""
+
+    def __init__(self, filename='a16z_api_endpoints.json'):
+        self.filename = filename
+        self.endpoints = []
+        self.discovered_at = None
+        if os.path.exists(filename):
+            try:
+                with open(filename, 'r', encoding='utf-8') as f:
+                    data = json.load(f)
+                self.endpoints = data['endpoints']
+                self.discovered_at = data.get('discovered_at')
+            except Exception as e:
+                print(f"Error loading API endpoints, ignoring them: {e}")
+
+    def __bool__(self):
+        return bool(self.endpoints)
+
+    def add(self, spec):
+        """Remember an endpoint, unless one with the same template is known; returns whether it was new"""
+        if any(endpoint['template'] == spec['template'] for endpoint in self.endpoints):
+            return False
+        self.endpoints.append(spec)
+        return True
+
+    def save(self):
+        self.discovered_at = time.time()
+        with atomic_write(self.filename) as f:
+            json.dump({'discovered_at': self.discovered_at, 'endpoints': self.endpoints}, f, indent=2)
+
+
+def _next_page(data, spec, url, page_records):
+    """URL of the page after `url`, or None if this was the last page"""
+    for container in (data,) + tuple(data.get(key) for key in NEXT_CONTAINERS if isinstance(data, dict)):
+        if not isinstance(container, dict):
+            continue
+        for key in NEXT_KEYS:
+            value = container.get(key)
+            if isinstance(value, str) and value:
+                if value.startswith(('http://', 'https://', '/')):
+                    return urljoin(url, value)
+                if key in ('nextCursor', 'next_cursor', 'cursor'):
+                    return _with_param(url, 'cursor', value)
+        if any(key in container for key in NEXT_KEYS):
+            return None  # The API says there is no next page
+
+    pagination = spec.get('pagination')
+    if not pagination or not page_records:
+        return None
+    current = dict(parse_qsl(urlsplit(url).query)).get(pagination['param'], '0')
+    step = 1 if pagination['kind'] == 'page' else len(page_records)
+    return _with_param(url, pagination['param'], str(int(current) + step))
+
+
+def _with_param(url, name, value):
+    parts = urlsplit(url)
+    query = [(key, item) for key, item in parse_qsl(parts.query, keep_blank_values=True) if key != name]
+    return urlunsplit(parts._replace(query=urlencode(query + [(name, value)])))
+
+
+def fetch_listings(fetch, spec, company):
+    """Call a discovered endpoint for `company`, following its pagination, and return its jobs as Listings
+
+    `fetch(url, headers)` returns a requests.Response or None. Relative job
+    links are resolved against the API page they came from. Returns None
+    if the endpoint does not answer with job records, or if a page fails
+    (or pagination ends short of the reported total) before all of them
+    were read, so the caller falls back to the HTML page instead of
+    publishing a partial list.
+    """
+    url = spec['template'].replace('{company}', company)
+    fields = spec['fields']
+    listings = []
+    seen = set()
+    total = None
+    for _ in range(MAX_PAGES):
+        response = fetch(url, spec.get('headers') or None)
+        if response is None:
+            return None
+        try:
+            data = response.json()
+        except ValueError:
+            return None
+
+        records = _lookup(data, spec['records_path'])
+        if not isinstance(records, list):
+            return None
+        if isinstance(data, dict) and total is None:
+            total = next((data[key] for key in TOTAL_KEYS if isinstance(data.get(key), int)), None)
+
+        new = 0
+        for record in records:
+            if not isinstance(record, dict):
+                continue
+            # Only a repeated record is a duplicate; distinct postings may share a title and have no link
+            key = json.dumps(record, sort_keys=True, default=str)
+            if key in seen:
+                continue
+            seen.add(key)
+            new += 1
+            title = _text(record.get(fields['title']))
+            href = _text(record.get(fields['url'])) if fields.get('url') else None
+            if href is not None:
+                href = urljoin(url, href)
+            location = _text(record.get(fields['location'])) if fields.get('location') else None
+            listings.append(Listing(title, location, href is not None, href))
+
+        # Stop when the API repeats itself (it ignored the page parameter) or we have everything
+        if not new or (total is not None and len(listings) >= total):
+            break
+        url = _next_page(data, spec, url, records)
+        if url is None:
+            break
+    else:
+        print(f"  {company} has more than {MAX_PAGES} pages of jobs, using the HTML page")
+        return None
+
+    if total is not None and len(listings) < total:
+        print(f"  The JSON API returned {len(listings)} of {total} jobs for {company}, using the HTML page")
+        return None
+    return listings
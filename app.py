@@ -1,8 +1,25 @@
-from flask import Flask, render_template_string, jsonify
+from flask import Flask, render_template_string, jsonify, request, g
+import gzip
+import hashlib
 import json
 import os
+import threading
+import time
+from collections import OrderedDict, deque
+from functools import cached_property
 from flask_cors import CORS
 
+from changes import ChangeLog, changes_since
+from history import SnapshotStore
+from jobs_index import JobsIndex, parse_page_args
+from metrics import Histogram, render_samples
+from storage import JobStore
+
+try:
+    import brotli
+except ImportError:  # brotli is optional, gzip is always available
+    brotli = None
+
 app = Flask(__name__)
 CORS(app)  # Enable CORS for all routes
 
@@ -48,19 +65,19 @@ HTML_TEMPLATE = '''
         <div class="grid grid-cols-1 md:grid-cols-4 gap-6 mb-8">
             <div class="bg-white rounded-xl shadow-lg p-6 border-l-4 border-blue-500">
                 <div class="text-gray-500 text-sm font-semibold uppercase">Total Jobs</div>
-                <div class="text-3xl font-bold text-gray-800 mt-2" id="total-jobs">{{ total_jobs }}</div>
+                <div class="text-3xl font-bold text-gray-800 mt-2" id="total-jobs">–</div>
             </div>
             <div class="bg-white rounded-xl shadow-lg p-6 border-l-4 border-purple-500">
                 <div class="text-gray-500 text-sm font-semibold uppercase">Companies</div>
-                <div class="text-3xl font-bold text-gray-800 mt-2" id="total-companies">{{ total_companies }}</div>
+                <div class="text-3xl font-bold text-gray-800 mt-2" id="total-companies">–</div>
             </div>
             <div class="bg-white rounded-xl shadow-lg p-6 border-l-4 border-green-500">
                 <div class="text-gray-500 text-sm font-semibold uppercase">Filtered</div>
-                <div class="text-3xl font-bold text-gray-800 mt-2" id="filtered-count">{{ total_jobs }}</div>
+                <div class="text-3xl font-bold text-gray-800 mt-2" id="filtered-count">–</div>
             </div>
             <div class="bg-white rounded-xl shadow-lg p-6 border-l-4 border-orange-500">
                 <div class="text-gray-500 text-sm font-semibold uppercase">Locations</div>
-                <div class="text-3xl font-bold text-gray-800 mt-2" id="total-locations">{{ total_locations }}</div>
+                <div class="text-3xl font-bold text-gray-800 mt-2" id="total-locations">–</div>
             </div>
         </div>
 
@@ -106,6 +123,9 @@ HTML_TEMPLATE = '''
             <!-- Jobs will be inserted here by JavaScript -->
         </div>
 
+        <!-- Loads the next page when scrolled into view -->
+        <div id="scroll-sentinel" class="h-8"></div>
+
         <!-- Loading State -->
         <div id="loading" class="hidden text-center py-12">
             <div class="inline-block animate-spin rounded-full h-12 w-12 border-b-2 border-blue-600"></div>
@@ -123,65 +143,62 @@ HTML_TEMPLATE = '''
     </div>
 
     <script>
-        let jobsData = {{ jobs_data | tojson }};
-        let filteredJobs = [...jobsData];
+        const PAGE_SIZE = 60;
+
+        // Current query and paging state; jobs are fetched from the API page by page
+        let nextCursor = null;
+        let isLoading = false;
+        let requestId = 0;
+
+        // Version of the data shown, kept current by the /api/events stream
+        let dataVersion = null;
 
         // Populate filter options
-        function populateFilters() {
-            const companies = [...new Set(jobsData.map(job => job.company))].sort();
-            const locations = [...new Set(jobsData.map(job => job.location))].sort();
+        async function populateFilters() {
+            const response = await fetch('/api/filters');
+            const filters = await response.json();
 
             const companySelect = document.getElementById('company-filter');
             const locationSelect = document.getElementById('location-filter');
+            const selectedCompany = companySelect.value;
+            const selectedLocation = locationSelect.value;
 
             // Clear existing options (except "All")
             companySelect.innerHTML = '<option value="">All Companies</option>';
             locationSelect.innerHTML = '<option value="">All Locations</option>';
 
-            companies.forEach(company => {
+            filters.companies.forEach(company => {
                 const option = document.createElement('option');
                 option.value = company;
                 option.textContent = company;
                 companySelect.appendChild(option);
             });
 
-            locations.forEach(location => {
+            filters.locations.forEach(location => {
                 const option = document.createElement('option');
                 option.value = location;
                 option.textContent = location;
                 locationSelect.appendChild(option);
             });
-        }
 
-        // Update stats
-        function updateStats() {
-            const totalCompanies = new Set(jobsData.map(job => job.company)).size;
-            const totalLocations = new Set(jobsData.map(job => job.location)).size;
-            
-            document.getElementById('total-jobs').textContent = jobsData.length;
-            document.getElementById('total-companies').textContent = totalCompanies;
-            document.getElementById('total-locations').textContent = totalLocations;
+            companySelect.value = selectedCompany;
+            locationSelect.value = selectedLocation;
         }
 
-        // Render jobs
-        function renderJobs(jobs) {
-            const container = document.getElementById('jobs-container');
-            const noResults = document.getElementById('no-results');
-            const loading = document.getElementById('loading');
-            
-            loading.classList.add('hidden');
-            
-            if (jobs.length === 0) {
-                container.classList.add('hidden');
-                noResults.classList.remove('hidden');
-                return;
-            }
+        // Update stats
+        async function updateStats() {
+            const response = await fetch('/api/stats');
+            const stats = await response.json();
 
-            container.classList.remove('hidden');
-            noResults.classList.add('hidden');
+            document.getElementById('total-jobs').textContent = stats.total_jobs;
+            document.getElementById('total-companies').textContent = stats.total_companies;
+            document.getElementById('total-locations').textContent = stats.total_locations;
+        }
 
-            container.innerHTML = jobs.map(job => `
-                <div class="bg-white rounded-xl shadow-lg hover:shadow-xl transition-shadow duration-300 overflow-hidden border border-gray-100">
+        // Render one job card
+        function jobCard(job) {
+            return `
+                <div data-job-id="${escapeHtml(job.id || '')}" class="bg-white rounded-xl shadow-lg hover:shadow-xl transition-shadow duration-300 overflow-hidden border border-gray-100">
                     <div class="p-6">
                         <div class="flex items-start justify-between mb-3">
                             <div class="flex-1">
@@ -212,9 +229,34 @@ HTML_TEMPLATE = '''
                         </div>
                     </div>
                 </div>
-            `).join('');
+            `;
+        }
 
-            document.getElementById('filtered-count').textContent = jobs.length;
+        // Render a page of jobs, replacing the grid or appending to it
+        function renderJobs(jobs, total, append) {
+            const container = document.getElementById('jobs-container');
+            const noResults = document.getElementById('no-results');
+            const loading = document.getElementById('loading');
+            
+            loading.classList.add('hidden');
+            document.getElementById('filtered-count').textContent = total;
+            
+            if (total === 0) {
+                container.innerHTML = '';
+                container.classList.add('hidden');
+                noResults.classList.remove('hidden');
+                return;
+            }
+
+            container.classList.remove('hidden');
+            noResults.classList.add('hidden');
+
+            const html = jobs.map(jobCard).join('');
+            if (append) {
+                container.insertAdjacentHTML('beforeend', html);
+            } else {
+                container.innerHTML = html;
+            }
         }
 
         // Escape HTML to prevent XSS
@@ -224,22 +266,49 @@ HTML_TEMPLATE = '''
             return div.innerHTML;
         }
 
-        // Filter jobs
-        function filterJobs() {
-            const searchTerm = document.getElementById('search-input').value.toLowerCase();
+        // Fetch the first page for the current filters, or the next page when appending
+        async function loadJobs(append) {
+            if (append && (isLoading || !nextCursor)) {
+                return;
+            }
+
+            const params = new URLSearchParams({ limit: PAGE_SIZE });
+            const searchTerm = document.getElementById('search-input').value.trim();
             const companyFilter = document.getElementById('company-filter').value;
             const locationFilter = document.getElementById('location-filter').value;
+            if (searchTerm) params.set('q', searchTerm);
+            if (companyFilter) params.set('company', companyFilter);
+            if (locationFilter) params.set('location', locationFilter);
+            if (append) params.set('cursor', nextCursor);
 
-            filteredJobs = jobsData.filter(job => {
-                const matchesSearch = job.title.toLowerCase().includes(searchTerm) || 
-                                     job.company.toLowerCase().includes(searchTerm);
-                const matchesCompany = !companyFilter || job.company === companyFilter;
-                const matchesLocation = !locationFilter || job.location === locationFilter;
+            // Responses to superseded queries are dropped
+            const currentRequest = ++requestId;
+            isLoading = true;
+            try {
+                const response = await fetch(`/api/jobs?${params}`);
+                const data = await response.json();
+                if (currentRequest !== requestId) {
+                    return;
+                }
+                nextCursor = data.next_cursor;
+                renderJobs(data.jobs, data.total, append);
+            } finally {
+                if (currentRequest === requestId) {
+                    isLoading = false;
+                }
+            }
+        }
 
-                return matchesSearch && matchesCompany && matchesLocation;
-            });
+        // Filter jobs
+        function filterJobs() {
+            nextCursor = null;
+            loadJobs(false).catch(error => console.error('Error loading jobs:', error));
+        }
 
-            renderJobs(filteredJobs);
+        let searchTimer = null;
+        function debouncedFilterJobs() {
+            clearTimeout(searchTimer);
+            searchTimer = setTimeout(filterJobs, 250);
         }
 
         // Refresh data from API
@@ -254,26 +323,95 @@ HTML_TEMPLATE = '''
             refreshBtn.textContent = '⏳ Refreshing...';
             
             try {
-                const response = await fetch('/api/jobs');
-                const data = await response.json();
-                
-                if (data && data.length > 0) {
-                    jobsData = data;
-                    filteredJobs = [...jobsData];
-                    populateFilters();
-                    updateStats();
-                    filterJobs();
-                }
+                await Promise.all([populateFilters(), updateStats()]);
+                nextCursor = null;
+                await loadJobs(false);
             } catch (error) {
                 console.error('Error refreshing data:', error);
                 alert('Failed to refresh data. Please try again.');
             } finally {
                 loading.classList.add('hidden');
+                container.classList.remove('hidden');
                 refreshBtn.disabled = false;
                 refreshBtn.textContent = '🔄 Refresh Data';
             }
         }
 
+        // Lowercase alphanumeric tokens, as the search index splits text
+        function tokenize(text) {
+            return (text || '').toLowerCase().match(/[a-z0-9]+/g) || [];
+        }
+
+        // Whether a job belongs in the current results, matching the API's search semantics
+        function matchesFilters(job) {
+            const companyFilter = document.getElementById('company-filter').value;
+            const locationFilter = document.getElementById('location-filter').value;
+            if (companyFilter && job.company !== companyFilter) return false;
+            if (locationFilter && job.location !== locationFilter) return false;
+            const jobTokens = tokenize(`${job.title} ${job.company}`);
+            return tokenize(document.getElementById('search-input').value)
+                .every(token => jobTokens.some(jobToken => jobToken.startsWith(token)));
+        }
+
+        function findCard(id) {
+            return id ? document.querySelector(`#jobs-container [data-job-id="${CSS.escape(id)}"]`) : null;
+        }
+
+        // Patch the cards shown with a `changes` event instead of reloading everything
+        function applyChanges(message) {
+            if (message.reset) {
+                dataVersion = message.version;
+                refreshData();
+                return;
+            }
+
+            const container = document.getElementById('jobs-container');
+            const filteredCount = document.getElementById('filtered-count');
+            let count = parseInt(filteredCount.textContent, 10) || 0;
+            let changed = false;
+            message.changes.forEach(change => {
+                // Changes already applied, e.g. repeated after a reconnect
+                if (dataVersion !== null && change.version <= dataVersion) return;
+                changed = true;
+
+                change.removed.forEach(job => {
+                    const card = findCard(job.id);
+                    if (card) card.remove();
+                    if (matchesFilters(job)) count--;
+                });
+                change.updated.forEach(job => {
+                    const card = findCard(job.id);
+                    if (!card) return;
+                    if (matchesFilters(job)) {
+                        card.outerHTML = jobCard(job);
+                    } else {
+                        card.remove();
+                        count--;
+                    }
+                });
+                change.added.filter(matchesFilters).forEach(job => {
+                    container.insertAdjacentHTML('afterbegin', jobCard(job));
+                    container.firstElementChild.classList.add('ring-2', 'ring-green-400');
+                    count++;
+                });
+            });
+            dataVersion = message.version;
+            if (!changed) return;
+
+            count = Math.max(count, 0);
+            filteredCount.textContent = count;
+            container.classList.toggle('hidden', count === 0);
+            document.getElementById('no-results').classList.toggle('hidden', count !== 0);
+            Promise.all([populateFilters(), updateStats()])
+                .catch(error => console.error('Error updating stats:', error));
+        }
+
+        // Follow data changes pushed by the server; EventSource reconnects by itself
+        function subscribeToChanges() {
+            const events = new EventSource('/api/events');
+            events.addEventListener('changes', event => applyChanges(JSON.parse(event.data)));
+        }
+
         // Clear filters
         document.getElementById('clear-filters').addEventListener('click', () => {
             document.getElementById('search-input').value = '';
@@ -286,65 +424,619 @@ HTML_TEMPLATE = '''
         document.getElementById('refresh-btn').addEventListener('click', refreshData);
 
         // Event listeners
-        document.getElementById('search-input').addEventListener('input', filterJobs);
+        document.getElementById('search-input').addEventListener('input', debouncedFilterJobs);
         document.getElementById('company-filter').addEventListener('change', filterJobs);
         document.getElementById('location-filter').addEventListener('change', filterJobs);
 
+        // Lazy-load the next page as the user scrolls to the end of the grid
+        new IntersectionObserver(entries => {
+            if (entries.some(entry => entry.isIntersecting)) {
+                loadJobs(true).catch(error => console.error('Error loading jobs:', error));
+            }
+        }, { rootMargin: '600px' }).observe(document.getElementById('scroll-sentinel'));
+
         // Initialize
-        populateFilters();
-        renderJobs(jobsData);
+        refreshData().then(subscribeToChanges);
     </script>
 </body>
 </html>
 '''
 
+# Response compressors in order of preference
+COMPRESSORS = {'gzip': lambda data: gzip.compress(data, compresslevel=6, mtime=0)}
+if brotli is not None:
+    COMPRESSORS = {'br': lambda data: brotli.compress(data, quality=5), **COMPRESSORS}
+
+JOBS_FILE = 'a16z_sde_jobs.json'
+JOBS_DB = 'a16z_jobs.db'
+# Written by the scraper at the end of each run
+RUN_SUMMARY_FILE = 'a16z_sde_jobs.run.json'
+HISTORY_DIR = 'a16z_history'
+
+# How often the /api/events publisher checks for new data, and how long an idle stream waits between keepalives
+EVENTS_POLL_SECONDS = 2
+EVENTS_KEEPALIVE_SECONDS = 15
+# Fields of removed jobs sent to dashboards, enough to find and uncount their cards
+REMOVED_EVENT_FIELDS = ('id', 'company', 'title', 'location')
+
+# Columns /api/trends can count jobs by
+TREND_COLUMNS = {'companies': 'company', 'locations': 'location', 'roles': 'roles', 'titles': 'title'}
+
+REQUEST_LATENCY = Histogram('dashboard_request_duration_seconds', 'Time to handle a request, by route.',
+                            ('route', 'method', 'status'))
+DATA_LOAD_TIME = Histogram('dashboard_data_load_seconds', 'Time to load a new version of the jobs data, by source.',
+                           ('source',))
+
+# Returned when the scraper has not produced a jobs file yet
+SAMPLE_JOBS = [
+    {
+        "company": "Example Company",
+        "title": "Software Engineer",
+        "location": "San Francisco, CA",
+        "url": "https://example.com/job",
+        "scraped_from": "https://jobs.a16z.com/jobs/example"
+    }
+]
+
+
+class EncodedBody:
+    """A serialized JSON response body and its compressed variants
+
+    Each variant is compressed the first time a client asks for it and then
+    reused for the rest of the data version. Variants get distinct strong
+    ETags, since they are different representations.
+    """
+
+    MIN_COMPRESS_SIZE = 1024
+
+    def __init__(self, body, etag):
+        self.etag = etag
+        self._variants = {'identity': body.encode('utf-8')}
+        self._lock = threading.Lock()
+
+    def negotiate(self, accept_encodings):
+        """Best encoding for the client's Accept-Encoding header"""
+        if len(self._variants['identity']) >= self.MIN_COMPRESS_SIZE:
+            for encoding in COMPRESSORS:
+                if accept_encodings[encoding]:
+                    return encoding
+        return 'identity'
+
+    def variant(self, encoding):
+        data = self._variants.get(encoding)
+        if data is None:
+            with self._lock:
+                data = self._variants.get(encoding)
+                if data is None:
+                    data = self._variants[encoding] = COMPRESSORS[encoding](self._variants['identity'])
+        return data
+
+    def variant_etag(self, encoding):
+        return self.etag if encoding == 'identity' else f"{self.etag}-{encoding}"
+
+
+class Snapshot:
+    """Versioned response bodies shared by both data sources
+
+    Subclasses set `key`, `last_modified`, `stats`, `filters` and `version`
+    (of the change history) and provide `jobs`, `query()` and
+    `changes_since()`.
+    """
+
+    QUERY_CACHE_SIZE = 256
+
+    def _init_bodies(self):
+        self.etag = hashlib.sha256(repr(self.key).encode('utf-8')).hexdigest()[:24]
+        # Response bodies are serialized once per version, not once per request
+        self.stats_body = EncodedBody(app.json.dumps(self.stats) + '\n', f"{self.etag}-stats")
+        self.filters_body = EncodedBody(app.json.dumps(self.filters) + '\n', f"{self.etag}-filters")
+        self._query_bodies = OrderedDict()
+        self._query_lock = threading.Lock()
+
+    @cached_property
+    def jobs_body(self):
+        return EncodedBody(app.json.dumps(self.jobs) + '\n', f"{self.etag}-jobs")
+
+    def query_body(self, **filters):
+        """Encoded body of one search page, kept for the most recent distinct queries"""
+        cache_key = tuple(sorted(filters.items()))
+        with self._query_lock:
+            body = self._query_bodies.get(cache_key)
+            if body is not None:
+                self._query_bodies.move_to_end(cache_key)
+                return body
+
+        query_etag = hashlib.sha256(repr(cache_key).encode('utf-8')).hexdigest()[:16]
+        body = EncodedBody(app.json.dumps(self.query(**filters)) + '\n', f"{self.etag}-q{query_etag}")
+        with self._query_lock:
+            self._query_bodies[cache_key] = body
+            if len(self._query_bodies) > self.QUERY_CACHE_SIZE:
+                self._query_bodies.popitem(last=False)
+        return body
+
+
+class JobsSnapshot(Snapshot):
+    """One parsed version of the jobs file with everything derived from it"""
+
+    def __init__(self, key, jobs, last_modified=None, change_entries=None):
+        self.key = key
+        self.jobs = jobs
+        self.stats = calculate_stats(jobs)
+        self.index = JobsIndex(jobs)
+        self.loaded_at = time.time()
+        self.last_modified = last_modified or self.loaded_at
+        self.change_entries = change_entries or []
+        self.version = change_entries[-1]['version'] if change_entries else 0
+        self.filters = {
+            'companies': sorted(company for company in self.index.by_company if company is not None),
+            'locations': sorted(location for location in self.index.by_location if location is not None)
+        }
+        self._init_bodies()
+
+    def query(self, **filters):
+        return self.index.query(**filters)
+
+    def changes_since(self, since):
+        return changes_since(self.change_entries, since)
+
+
+class DatabaseSnapshot(Snapshot):
+    """One finished scrape run in the jobs database
+
+    Stats and filters are computed once per run; searches are answered by
+    the database's indexes, and the full job list and change entries are
+    only read if asked for.
+    """
+
+    def __init__(self, key, store):
+        self.key = key
+        self.store = store
+        self.stats = store.stats()
+        self.filters = store.filters()
+        self.loaded_at = time.time()
+        self.last_modified = store.run_finished_at(key[1])
+        self.version = store.changes_version()
+        self._init_bodies()
+
+    @cached_property
+    def jobs(self):
+        return list(self.store.iter_jobs())
+
+    def query(self, **filters):
+        return self.store.query(**filters)
+
+    def changes_since(self, since):
+        return self.store.changes_since(since, until=self.version)
+
+
+class JobsDataCache:
+    """Process-wide cache of the jobs data, keyed on its version
+
+    The data comes from the jobs database once the scraper has finished a
+    run into it (versioned by run), and otherwise from the jobs file (keyed
+    on its mtime, size and inode). Requests share the current snapshot
+    without taking a lock. When the data changes, the first request to
+    notice loads a new snapshot and swaps it in with a single reference
+    assignment, so readers always see either the old or the new version in
+    full.
+    """
+
+    def __init__(self, filename, db_filename):
+        self.filename = filename
+        self.db_filename = db_filename
+        self._store = None
+        self.hits = 0
+        self.misses = 0
+        self._snapshot = None
+        self._load_lock = threading.Lock()
+        self._counter_lock = threading.Lock()
+
+    def _db_key(self):
+        if self._store is None:
+            if not os.path.exists(self.db_filename):
+                return None
+            self._store = JobStore(self.db_filename)
+        version = self._store.data_version()
+        return ('db', version) if version is not None else None
+
+    def _file_key(self):
+        try:
+            stat = os.stat(self.filename)
+        except FileNotFoundError:
+            return None
+        return ('file', stat.st_mtime_ns, stat.st_size, stat.st_ino)
+
+    def _count(self, hit):
+        with self._counter_lock:
+            if hit:
+                self.hits += 1
+            else:
+                self.misses += 1
+
+    def get(self, count=True):
+        """Return the snapshot for the jobs data as it is on disk now
+
+        `count=False` leaves the hit/miss counters to requests, for
+        background polling.
+        """
+        key = self._db_key() or self._file_key() or ('sample',)
+        snapshot = self._snapshot
+        if snapshot is not None and snapshot.key == key:
+            if count:
+                self._count(hit=True)
+            return snapshot
+
+        with self._load_lock:
+            # Another request may have loaded this version while we waited
+            snapshot = self._snapshot
+            if snapshot is not None and snapshot.key == key:
+                if count:
+                    self._count(hit=True)
+                return snapshot
+
+            if count:
+                self._count(hit=False)
+            start = time.perf_counter()
+            snapshot = DatabaseSnapshot(key, self._store) if key[0] == 'db' else self._load()
+            DATA_LOAD_TIME.observe(time.perf_counter() - start, snapshot.key[0])
+            self._snapshot = snapshot
+            return snapshot
+
+    def _load(self):
+        if not os.path.exists(self.filename):
+            # Return sample data if file doesn't exist
+            return JobsSnapshot(('sample',), SAMPLE_JOBS)
+
+        try:
+            with open(self.filename, 'r', encoding='utf-8') as f:
+                # Key on the file we actually read, in case it is replaced meanwhile
+                stat = os.fstat(f.fileno())
+                key = ('file', stat.st_mtime_ns, stat.st_size, stat.st_ino)
+                jobs = json.load(f)
+            # The scraper records the change log entry before replacing the file
+            change_log = ChangeLog(f"{os.path.splitext(self.filename)[0]}.changes.jsonl")
+            return JobsSnapshot(key, jobs, last_modified=stat.st_mtime, change_entries=change_log.entries())
+        except Exception as e:
+            print(f"Error loading jobs data: {e}")
+            return JobsSnapshot(self._file_key() or ('error',), [])
+
+    def info(self):
+        """Hit/miss counters and details of the current snapshot"""
+        snapshot = self._snapshot
+        return {
+            'hits': self.hits,
+            'misses': self.misses,
+            'source': snapshot.key[0] if snapshot else None,
+            'jobs': snapshot.stats['total_jobs'] if snapshot else 0,
+            'loaded_at': snapshot.loaded_at if snapshot else None
+        }
+
+
+def format_event(message):
+    """A server-sent `changes` event of a changes_since() message, with its version as the event id
+
+    Removed jobs are cut down to the fields dashboards need to drop them.
+    """
+    changes = [
+        {'version': change['version'], 'added': change['added'], 'updated': change['updated'],
+         'removed': [{field: job.get(field) for field in REMOVED_EVENT_FIELDS} for job in change['removed']]}
+        for change in message['changes']
+    ]
+    data = app.json.dumps({'version': message['version'], 'reset': message['reset'], 'changes': changes})
+    return f"id: {message['version']}\nevent: changes\ndata: {data}\n\n".encode('utf-8')
+
+
+class ChangeBroadcaster:
+    """Pushes new versions of the jobs data to connected dashboards as server-sent events
+
+    One background thread checks the jobs cache for a new snapshot every
+    `poll_seconds` while anyone is listening, and formats the delta since
+    the last version it published once, as a single event shared by every
+    stream. Streams wait on a condition for new events and send a
+    keepalive comment when idle. The last few events are kept, so a stream
+    that was slow to pick one up still sends them in order; a stream that
+    fell further behind tells its client to reload instead.
+    """
+
+    BACKLOG = 16
+
+    def __init__(self, cache, poll_seconds=EVENTS_POLL_SECONDS, keepalive_seconds=EVENTS_KEEPALIVE_SECONDS):
+        self.cache = cache
+        self.poll_seconds = poll_seconds
+        self.keepalive_seconds = keepalive_seconds
+        self.clients = 0
+        self._events = deque(maxlen=self.BACKLOG)
+        self._sequence = 0
+        self._condition = threading.Condition()
+        self._thread = None
+
+    def _start(self):
+        """Start the publisher with the first stream, so importing the app starts no threads"""
+        with self._condition:
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, daemon=True)
+                self._thread.start()
+
+    def _run(self):
+        snapshot = self.cache.get(count=False)
+        key, version = snapshot.key, snapshot.version
+        while True:
+            time.sleep(self.poll_seconds)
+            if not self.clients:
+                continue
+            try:
+                snapshot = self.cache.get(count=False)
+            except Exception as e:
+                print(f"Error checking for new jobs data: {e}")
+                continue
+            if snapshot.key == key:
+                continue
+
+            message = snapshot.changes_since(version)
+            if not message['changes']:
+                # New data without a recorded change (e.g. the file was replaced by hand)
+                message['reset'] = True
+            self.publish(format_event(message))
+            key, version = snapshot.key, message['version']
+
+    def publish(self, event):
+        with self._condition:
+            self._sequence += 1
+            self._events.append((self._sequence, event))
+            self._condition.notify_all()
+
+    def stream(self, since=None):
+        """Generator of a client's event stream
+
+        Starts with the changes after version `since` (the client's
+        Last-Event-ID) or, for a new client, an empty event with the current
+        version, then follows new events as they are published.
+        """
+        self._start()
+        with self._condition:
+            self.clients += 1
+            sent = self._sequence
+        try:
+            snapshot = self.cache.get(count=False)
+            if since is None:
+                since = snapshot.version
+            # Tell clients how long to wait before reconnecting
+            yield f"retry: {int(self.poll_seconds * 1000)}\n".encode('utf-8')
+            yield format_event(snapshot.changes_since(since))
+
+            while True:
+                with self._condition:
+                    self._condition.wait_for(lambda: self._sequence > sent, timeout=self.keepalive_seconds)
+                    pending = [(sequence, event) for sequence, event in self._events if sequence > sent]
+                    sequence = self._sequence
+                if not pending:
+                    yield b": keepalive\n\n"
+                    continue
+                if pending[0][0] != sent + 1:
+                    # Missed events that are no longer kept
+                    snapshot = self.cache.get(count=False)
+                    yield format_event({'version': snapshot.version, 'reset': True, 'changes': []})
+                else:
+                    for _, event in pending:
+                        yield event
+                sent = sequence
+        finally:
+            with self._condition:
+                self.clients -= 1
+
+
+jobs_cache = JobsDataCache(JOBS_FILE, JOBS_DB)
+broadcaster = ChangeBroadcaster(jobs_cache)
+history = SnapshotStore(HISTORY_DIR)
+
+# The dashboard is a static shell that loads its data from the API, so it is
+# rendered once and revalidated by ETag instead of being rebuilt per request
+with app.app_context():
+    INDEX_HTML = render_template_string(HTML_TEMPLATE).encode('utf-8')
+INDEX_ETAG = hashlib.sha256(INDEX_HTML).hexdigest()[:32]
+
+
+# The last run summary read and the version of the file it was read from
+_run_summary_cache = {}
+
+
+def load_run_summary(filename=RUN_SUMMARY_FILE):
+    """The scraper's last run summary, re-read only when the file changes; None if there is none"""
+    _cache = _run_summary_cache
+    try:
+        stat = os.stat(filename)
+    except FileNotFoundError:
+        return None
+    key = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+    if _cache.get('key') != key:
+        try:
+            with open(filename, 'r', encoding='utf-8') as f:
+                _cache['summary'] = json.load(f)
+        except ValueError as e:
+            print(f"Error loading run summary: {e}")
+            _cache['summary'] = None
+        _cache['key'] = key
+    return _cache['summary']
+
+
+@app.before_request
+def start_timer():
+    g.request_started = time.perf_counter()
+
+
+@app.after_request
+def record_latency(response):
+    """Observe the request's latency under its route pattern, so URLs with parameters share a series"""
+    started = g.pop('request_started', None)
+    if started is not None:
+        route = request.url_rule.rule if request.url_rule else 'unmatched'
+        REQUEST_LATENCY.observe(time.perf_counter() - started, route, request.method, response.status_code)
+    return response
+
+
+def json_response(body, last_modified):
+    """Conditional, content-negotiated response for an EncodedBody
+
+    Clients revalidate with If-None-Match or If-Modified-Since and get a
+    304 Not Modified while the data version is unchanged.
+    """
+    encoding = body.negotiate(request.accept_encodings)
+    response = app.response_class(body.variant(encoding), mimetype='application/json')
+    if encoding != 'identity':
+        response.headers['Content-Encoding'] = encoding
+    response.vary.add('Accept-Encoding')
+    response.set_etag(body.variant_etag(encoding))
+    response.last_modified = last_modified
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+
 @app.route('/')
 def index():
     """Main dashboard page"""
-    jobs_data = load_jobs_data()
-    stats = calculate_stats(jobs_data)
-    
-    return render_template_string(
-        HTML_TEMPLATE,
-        jobs_data=jobs_data,
-        **stats
-    )
+    response = app.response_class(INDEX_HTML, mimetype='text/html')
+    response.set_etag(INDEX_ETAG)
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
 
 @app.route('/api/jobs')
 def get_jobs():
-    """API endpoint to get jobs data with CORS support"""
-    jobs_data = load_jobs_data()
-    return jsonify(jobs_data)
+    """API endpoint to get jobs data with CORS support
+    
+    Without query parameters, returns every job. With any of `q`, `company`,
+    `location`, `page`/`cursor` or `limit`, returns one page of matching jobs:
+    {"jobs": [...], "total": ..., "offset": ..., "page": ..., "limit": ..., "next_cursor": ...}
+    """
+    snapshot = jobs_cache.get()
+    if not request.args:
+        return json_response(snapshot.jobs_body, snapshot.last_modified)
+    
+    try:
+        offset, limit = parse_page_args(request.args)
+    except ValueError as e:
+        return jsonify({'error': str(e)}), 400
+    
+    body = snapshot.query_body(
+        q=request.args.get('q'),
+        company=request.args.get('company'),
+        location=request.args.get('location'),
+        offset=offset,
+        limit=limit
+    )
+    return json_response(body, snapshot.last_modified)
 
 @app.route('/api/stats')
 def get_stats():
     """API endpoint to get statistics"""
-    jobs_data = load_jobs_data()
-    stats = calculate_stats(jobs_data)
-    return jsonify(stats)
+    snapshot = jobs_cache.get()
+    return json_response(snapshot.stats_body, snapshot.last_modified)
 
-def load_jobs_data():
-    """Load jobs data from JSON file"""
-    jobs_file = 'a16z_sde_jobs.json'
-    
-    if not os.path.exists(jobs_file):
-        # Return sample data if file doesn't exist
-        return [
-            {
-                "company": "Example Company",
-                "title": "Software Engineer",
-                "location": "San Francisco, CA",
-                "url": "https://example.com/job",
-                "scraped_from": "https://jobs.a16z.com/jobs/example"
-            }
-        ]
+@app.route('/api/filters')
+def get_filters():
+    """API endpoint to get the companies and locations to filter by"""
+    snapshot = jobs_cache.get()
+    return json_response(snapshot.filters_body, snapshot.last_modified)
+
+@app.route('/api/changes')
+def get_changes():
+    """API endpoint to get the jobs added, removed and updated since a data version
+
+    Returns {"version": ..., "reset": ..., "changes": [...]}, where each change
+    has "version", "timestamp", "added", "removed" and "updated". Clients
+    keep the returned version and pass it as `since` next time; `reset`
+    means their version is no longer in the history and they must refetch.
+    """
+    try:
+        since = int(request.args.get('since', 0))
+    except ValueError:
+        return jsonify({'error': 'since must be an integer version'}), 400
+    snapshot = jobs_cache.get()
+    response = jsonify(snapshot.changes_since(since))
+    response.set_etag(f"{snapshot.etag}-changes-{since}")
+    response.last_modified = snapshot.last_modified
+    response.cache_control.no_cache = True
+    return response.make_conditional(request)
+
+@app.route('/api/events')
+def get_events():
+    """Server-sent events stream of changes to the jobs data
+
+    Each `changes` event has the same shape as /api/changes and the new
+    data version as its id, so a reconnecting EventSource resumes from the
+    last version it saw through Last-Event-ID (or `since`).
+    """
+    since = request.headers.get('Last-Event-ID') or request.args.get('since')
+    try:
+        since = int(since) if since is not None else None
+    except ValueError:
+        return jsonify({'error': 'Last-Event-ID and since must be integer versions'}), 400
+    response = app.response_class(broadcaster.stream(since), mimetype='text/event-stream')
+    response.cache_control.no_cache = True
+    # Stop reverse proxies from buffering the stream
+    response.headers['X-Accel-Buffering'] = 'no'
+    return response
+
+@app.route('/api/trends')
+def get_trends():
+    """API endpoint to get trends over the stored history of scrape runs
     
+    `metric` is one of companies, locations, roles or titles (job counts per
+    value in each of the `last` runs, for the `top` values) or time_to_fill
+    (days postings stay up). `company` restricts either to one company.
+    """
+    metric = request.args.get('metric', 'companies')
+    company = request.args.get('company') or None
     try:
-        with open(jobs_file, 'r', encoding='utf-8') as f:
-            return json.load(f)
-    except Exception as e:
-        print(f"Error loading jobs data: {e}")
-        return []
+        last = int(request.args.get('last', 30))
+        top = int(request.args.get('top', 10))
+        if not 1 <= last <= 1000 or not 1 <= top <= 100:
+            raise ValueError
+    except ValueError:
+        return jsonify({'error': 'last must be between 1 and 1000 and top between 1 and 100'}), 400
+    
+    if metric == 'time_to_fill':
+        return jsonify(history.time_to_fill(company=company, top=top))
+    if metric not in TREND_COLUMNS:
+        return jsonify({'error': f"metric must be one of {', '.join(list(TREND_COLUMNS) + ['time_to_fill'])}"}), 400
+    where = ('company', company) if company else None
+    return jsonify(history.counts_over_time(TREND_COLUMNS[metric], last=last, top=top, where=where))
+
+@app.route('/metrics')
+def get_metrics():
+    """Prometheus metrics: request latencies, data loads and the last scrape run"""
+    cache = jobs_cache.info()
+    lines = REQUEST_LATENCY.render() + DATA_LOAD_TIME.render()
+    lines += render_samples('dashboard_cache_requests_total', 'Jobs data cache lookups, by result.', 'counter',
+                            [({'result': 'hit'}, cache['hits']), ({'result': 'miss'}, cache['misses'])])
+    lines += render_samples('dashboard_jobs', 'Jobs in the data currently served.', 'gauge',
+                            [({}, cache['jobs'] if cache['source'] else None)])
+    lines += render_samples('dashboard_data_loaded_timestamp_seconds', 'When the data currently served was loaded.',
+                            'gauge', [({}, cache['loaded_at'])])
+
+    summary = load_run_summary()
+    if summary is not None:
+        lines += render_samples('scrape_last_run_timestamp_seconds', 'When the last scrape run finished.', 'gauge',
+                                [({}, summary['finished_at'])])
+        lines += render_samples('scrape_last_run_duration_seconds', 'Duration of the last scrape run.', 'gauge',
+                                [({}, summary['duration_seconds'])])
+        lines += render_samples('scrape_last_run_jobs', 'Jobs saved by the last scrape run.', 'gauge',
+                                [({}, summary.get('jobs'))])
+        lines += render_samples('scrape_last_run_phase_seconds', 'Time the last scrape run spent in each phase.',
+                                'gauge', [({'phase': phase}, seconds)
+                                          for phase, seconds in summary['phase_seconds'].items()])
+        lines += render_samples('scrape_last_run_events', 'Counters of the last scrape run, by event.', 'gauge',
+                                [({'event': name}, value) for name, value in sorted(summary['counters'].items())])
+
+    return app.response_class('\n'.join(lines) + '\n', mimetype='text/plain; version=0.0.4')
+
+@app.route('/api/cache')
+def get_cache_info():
+    """API endpoint to get jobs cache hit/miss counters"""
+    return jsonify(jobs_cache.info())
+
+def load_jobs_data():
+    """Load jobs data from the jobs database or JSON file, cached until it changes"""
+    return jobs_cache.get().jobs
 
 def calculate_stats(jobs_data):
     """Calculate statistics from jobs data"""
@@ -0,0 +1,152 @@
+"""Load-test the dashboard on synthetic jobs data
+
+Generates jobs data of each size in --sizes, points the dashboard at it
+and times requests to /, /api/stats and /api/jobs (the full list and
+search pages) through Flask's test client, so no server or network is
+involved. The first request of each size also builds the data snapshot
+and is reported separately as the cold load. With --source file the data
+is a jobs JSON file; with --source db (the dashboard's default source once
+the scraper has run) it is a jobs database filled through JobStore, as a
+scrape run would.
+
+    python benchmarks/bench_dashboard.py [--source file|db] [--sizes 1000,10000,100000,1000000] [--requests 50] [--output results.json]
+"""
+import argparse
+import contextlib
+import os
+import random
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import app as dashboard
+from changes import job_id
+from harness import emit, summarize, timed
+from output import write_json_atomic
+from storage import JobStore
+
+TITLE_LEVELS = ['', 'Senior ', 'Staff ', 'Principal ', 'Junior ']
+TITLE_ROLES = [
+    ('Software Engineer', ['sde']), ('Backend Engineer', ['sde']), ('Frontend Developer', ['sde']),
+    ('Full Stack Engineer', ['sde']), ('Machine Learning Engineer', ['sde', 'ml']),
+    ('Site Reliability Engineer', ['sde', 'infra']), ('Data Engineer', ['sde', 'data']),
+    ('Security Engineer', ['sde', 'security']), ('iOS Engineer', ['sde', 'mobile'])
+]
+LOCATIONS = ['San Francisco, CA', 'New York, NY', 'Remote', 'London, UK', 'Seattle, WA', 'Austin, TX',
+             'Berlin, Germany', 'Toronto, Canada', 'Not specified']
+
+# Requests timed for each dataset size
+ENDPOINTS = [
+    '/',
+    '/api/stats',
+    '/api/jobs',
+    '/api/jobs?limit=50',
+    '/api/jobs?q=engineer&limit=50',
+    '/api/jobs?q=sen back&location=Remote&limit=50',
+    '/api/jobs?company=company-00001&limit=50'
+]
+
+
+def synthetic_jobs(count, seed=0):
+    """`count` plausible jobs spread over count/20 companies"""
+    rng = random.Random(seed)
+    companies = [f"company-{i:05d}" for i in range(max(1, count // 20))]
+    for i in range(count):
+        company = rng.choice(companies)
+        role, roles = rng.choice(TITLE_ROLES)
+        job = {
+            'company': company,
+            'title': f"{rng.choice(TITLE_LEVELS)}{role}",
+            'location': rng.choice(LOCATIONS),
+            'url': f"https://jobs.example.com/{company}/{i}",
+            'scraped_from': f"https://jobs.a16z.com/jobs/{company}",
+            'roles': roles
+        }
+        job['id'] = job_id(job)
+        yield job
+
+
+def write_database(filename, jobs, workdir):
+    """Store jobs in a jobs database as one finished scrape run, a company at a time"""
+    store = JobStore(filename, json_filename=os.path.join(workdir, 'export.json'),
+                     csv_filename=os.path.join(workdir, 'export.csv'))
+    store.begin_run(resume=False)
+    by_company = {}
+    for job in jobs:
+        by_company.setdefault(job['company'], []).append(job)
+    # The store reports its progress on stdout, where the results go
+    with contextlib.redirect_stdout(sys.stderr):
+        for company, company_jobs in by_company.items():
+            store.write_company(company, company_jobs)
+        store.finalize()
+    store.close()
+
+
+def bench_size(size, args, workdir):
+    if args.source == 'db':
+        filename = os.path.join(workdir, f"jobs_{size}.db")
+        write_database(filename, synthetic_jobs(size, args.seed), workdir)
+        dashboard.jobs_cache = dashboard.JobsDataCache(os.path.join(workdir, 'missing.json'), filename)
+    else:
+        filename = os.path.join(workdir, f"jobs_{size}.json")
+        write_json_atomic(filename, synthetic_jobs(size, args.seed))
+        dashboard.jobs_cache = dashboard.JobsDataCache(filename, os.path.join(workdir, 'missing.db'))
+    client = dashboard.app.test_client()
+    headers = {'Accept-Encoding': 'gzip'} if args.gzip else {}
+
+    seconds, _ = timed(client.get, '/api/stats', headers=headers)
+    # The source the dashboard actually served from, in case it fell back to another one
+    result = {'jobs': size, 'served_from': dashboard.jobs_cache.info()['source'],
+              'file_bytes': os.path.getsize(filename), 'cold_load_ms': round(seconds * 1000, 3), 'endpoints': {}}
+
+    for endpoint in ENDPOINTS:
+        runs = [timed(client.get, endpoint, headers=headers) for _ in range(args.requests)]
+        response = runs[-1][1]
+        result['endpoints'][endpoint] = {
+            **summarize([seconds for seconds, _ in runs]),
+            'status': response.status_code,
+            'bytes': len(response.get_data())
+        }
+
+        # Revalidation by an up-to-date client
+        etag = response.headers.get('ETag')
+        if etag:
+            runs = [timed(client.get, endpoint, headers={**headers, 'If-None-Match': etag})
+                    for _ in range(args.requests)]
+            result['endpoints'][endpoint]['not_modified'] = {
+                **summarize([seconds for seconds, _ in runs]),
+                'status': runs[-1][1].status_code
+            }
+
+    for suffix in ('', '-wal', '-shm'):
+        if os.path.exists(filename + suffix):
+            os.remove(filename + suffix)
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--source', choices=('file', 'db'), default='file',
+                        help="serve the jobs from a JSON file or from a jobs database")
+    parser.add_argument('--sizes', default='1000,10000,100000', help="comma-separated numbers of jobs, up to 1000000")
+    parser.add_argument('--requests', type=int, default=50, help="timed requests per endpoint and size")
+    parser.add_argument('--gzip', action='store_true', help="send Accept-Encoding: gzip")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the synthetic data")
+    parser.add_argument('--output', help="write the JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    sizes = [int(size) for size in args.sizes.split(',') if size.strip()]
+    results = []
+    with tempfile.TemporaryDirectory() as workdir:
+        for size in sizes:
+            print(f"Benchmarking {size} jobs...", file=sys.stderr)
+            results.append(bench_size(size, args, workdir))
+
+    config = {key: value for key, value in vars(args).items() if key != 'output'}
+    config['sizes'] = sizes
+    emit('dashboard', config, results, args.output)
+
+
+if __name__ == '__main__':
+    main()
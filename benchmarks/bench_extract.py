@@ -0,0 +1,78 @@
+"""Compare the HTML extraction engines on saved company pages
+
+Save real pages (e.g. `driver.page_source` of a few company boards) as .html
+files in benchmarks/fixtures/, then run:
+
+    python benchmarks/bench_extract.py [--repeat 20] [--json]
+
+Every engine must produce the same listings as html.parser on every fixture;
+mismatches are reported and make the script exit non-zero.
+"""
+import argparse
+import glob
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from extract import ENGINES, HtmlParserEngine, get_engine
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def time_engine(engine, html, repeat):
+    """Best wall time, in milliseconds, of extracting listings from `html`"""
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter()
+        engine.extract(html)
+        best = min(best, time.perf_counter() - start)
+    return best * 1000
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help="directory of saved .html pages")
+    parser.add_argument('--repeat', type=int, default=20, help="timed runs per engine and page")
+    parser.add_argument('--json', action='store_true', help="print results as JSON")
+    args = parser.parse_args()
+
+    engines = []
+    for name in ENGINES:
+        try:
+            engines.append(get_engine(name))
+        except ValueError as e:
+            print(f"Skipping {name}: {e}", file=sys.stderr)
+
+    baseline = HtmlParserEngine()
+    results = []
+    mismatches = 0
+    for path in sorted(glob.glob(os.path.join(args.fixtures, '*.html'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            html = f.read()
+
+        expected = baseline.extract(html)
+        page = {'page': os.path.basename(path), 'bytes': len(html), 'listings': len(expected or []), 'engines': {}}
+        for engine in engines:
+            same = engine.extract(html) == expected
+            mismatches += not same
+            page['engines'][engine.name] = {'ms': round(time_engine(engine, html, args.repeat), 3), 'matches_baseline': same}
+        results.append(page)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        for page in results:
+            print(f"\n{page['page']} ({page['bytes']} bytes, {page['listings']} listings)")
+            base_ms = page['engines'][baseline.name]['ms']
+            for name, result in page['engines'].items():
+                flag = '' if result['matches_baseline'] else '  OUTPUT DIFFERS'
+                print(f"  {name:12} {result['ms']:9.3f} ms  {base_ms / result['ms']:5.1f}x{flag}")
+
+    return 1 if mismatches else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
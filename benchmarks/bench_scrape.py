@@ -0,0 +1,89 @@
+"""Time the scraper against a local stand-in job board
+
+Serves the saved pages in benchmarks/fixtures/ with benchmarks/standin_site.py
+and times each scraper phase over plain HTTP, without Chrome or the live site:
+
+  * get_companies: fetching and parsing the companies list
+  * parse: extracting and classifying jobs from each saved page
+  * scrape_company_jobs: fetching and parsing one company
+  * scrape_all_jobs: the whole run, end to end
+
+    python benchmarks/bench_scrape.py [--companies 50] [--latency 0.05] [--workers 4] [--output results.json]
+"""
+import argparse
+import contextlib
+import io
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from harness import emit, summarize, timed
+from ratelimit import AdaptiveRateLimiter
+from scrape import A16zJobsScraper
+from standin_site import FIXTURES_DIR, StandInSite
+
+
+def make_scraper(site, args):
+    # The stand-in site is local, so the rate limiter should never be what is measured
+    rate_limiter = AdaptiveRateLimiter(rate=args.max_rate, max_rate=args.max_rate, burst=args.workers)
+    return A16zJobsScraper(rate_limiter=rate_limiter, engine=args.engine, base_url=site.url)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--companies', type=int, default=50, help="companies on the stand-in site")
+    parser.add_argument('--latency', type=float, default=0.05, help="seconds added to every response")
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help="directory of saved .html company pages")
+    parser.add_argument('--workers', type=int, default=1, help="scrape_all_jobs workers")
+    parser.add_argument('--parse-workers', type=int, default=0, help="scrape_all_jobs parser processes")
+    parser.add_argument('--engine', choices=('lxml', 'html.parser'), help="HTML extraction engine")
+    parser.add_argument('--repeat', type=int, default=5, help="timed runs of each phase")
+    parser.add_argument('--max-rate', type=float, default=1000.0, help="page loads per second allowed to the stand-in site")
+    parser.add_argument('--verbose', action='store_true', help="show the scraper's own output")
+    parser.add_argument('--output', help="write the JSON results to this file instead of stdout")
+    args = parser.parse_args()
+
+    results = {}
+    quiet = contextlib.nullcontext() if args.verbose else contextlib.redirect_stdout(io.StringIO())
+    with StandInSite(args.companies, args.latency, args.fixtures) as site, quiet:
+        scraper = make_scraper(site, args)
+        try:
+            runs = [timed(scraper.get_companies) for _ in range(args.repeat)]
+            results['get_companies'] = {**summarize([seconds for seconds, _ in runs]),
+                                        'companies': len(runs[-1][1])}
+
+            parse_times = []
+            for page in site.pages:
+                html = page.decode('utf-8')
+                url = f"{site.url}/jobs/bench"
+                parse_times.extend(timed(scraper._parse_jobs, html, 'bench', url)[0] for _ in range(args.repeat))
+            results['parse'] = {**summarize(parse_times), 'pages': len(site.pages)}
+
+            sample = site.companies[:args.repeat]
+            runs = [timed(scraper.scrape_company_jobs, company) for company in sample]
+            results['scrape_company_jobs'] = {**summarize([seconds for seconds, _ in runs]),
+                                              'jobs': sum(len(jobs) for _, jobs in runs)}
+        finally:
+            scraper.close()
+
+        scraper = make_scraper(site, args)
+        try:
+            requests_before = site.requests
+            seconds, jobs = timed(scraper.scrape_all_jobs, workers=args.workers, parse_workers=args.parse_workers)
+            results['scrape_all_jobs'] = {
+                'seconds': round(seconds, 3),
+                'jobs': len(jobs),
+                'requests': site.requests - requests_before,
+                'companies_per_second': round(len(site.companies) / seconds, 2),
+                'failed_companies': len(scraper.failed_companies)
+            }
+        finally:
+            scraper.close()
+
+    config = {key: value for key, value in vars(args).items() if key not in ('output', 'verbose')}
+    emit('scrape', config, results, args.output)
+
+
+if __name__ == '__main__':
+    main()
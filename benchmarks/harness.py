@@ -0,0 +1,57 @@
+"""Shared helpers for the benchmark scripts: timing summaries and run metadata"""
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+REPO_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def summarize(seconds):
+    """Millisecond summary of a list of timings"""
+    ms = sorted(value * 1000 for value in seconds)
+    return {
+        'runs': len(ms),
+        'mean_ms': round(statistics.fmean(ms), 3),
+        'p50_ms': round(ms[len(ms) // 2], 3),
+        'p95_ms': round(ms[min(len(ms) - 1, int(len(ms) * 0.95))], 3),
+        'min_ms': round(ms[0], 3),
+        'max_ms': round(ms[-1], 3)
+    }
+
+
+def timed(function, *args, **kwargs):
+    """Call `function`, returning (seconds taken, its result)"""
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return time.perf_counter() - start, result
+
+
+def metadata():
+    """What the results were measured on, so runs on different commits can be compared"""
+    try:
+        commit = subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=REPO_DIR, capture_output=True,
+                                text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        commit = None
+    return {
+        'commit': commit,
+        'timestamp': time.time(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'cpus': os.cpu_count()
+    }
+
+
+def emit(benchmark, config, results, output=None):
+    """Print the results as JSON, or write them to `output`"""
+    document = json.dumps({'benchmark': benchmark, **metadata(), 'config': config, 'results': results}, indent=2)
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            f.write(document + '\n')
+        print(f"Wrote results to {output}", file=sys.stderr)
+    else:
+        print(document)
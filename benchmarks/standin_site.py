@@ -0,0 +1,128 @@
+"""Serve recorded company pages from a local stand-in for jobs.a16z.com
+
+Mimics the site's URL layout: /companies lists `--companies` companies and
+/jobs/<company> serves one of the saved pages in benchmarks/fixtures/
+(chosen by company, so a company always gets the same page). Every
+response is delayed by `--latency` seconds to approximate the real site.
+
+    python benchmarks/standin_site.py [--port 8000] [--companies 50] [--latency 0.05]
+
+then point the scraper at it with `python scrape.py --base-url http://127.0.0.1:8000`.
+"""
+import argparse
+import glob
+import os
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+FIXTURES_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'fixtures')
+
+
+def load_pages(fixtures_dir=FIXTURES_DIR):
+    """The saved company pages, as bytes"""
+    pages = []
+    for path in sorted(glob.glob(os.path.join(fixtures_dir, '*.html'))):
+        with open(path, 'rb') as f:
+            pages.append(f.read())
+    if not pages:
+        raise ValueError(f"No .html pages in {fixtures_dir}")
+    return pages
+
+
+def companies_page(companies):
+    links = '\n'.join(f'  <a class="company-card" href="/jobs/{company}">{company}</a>' for company in companies)
+    return f"<!DOCTYPE html>\n<html><body>\n<main>\n{links}\n</main>\n</body></html>\n".encode('utf-8')
+
+
+class StandInSite:
+    """A threaded local HTTP server with the job board's URL layout
+
+    Use as a context manager; `url` is the base URL to scrape. `requests`
+    counts the requests served.
+    """
+
+    def __init__(self, companies=50, latency=0.0, fixtures_dir=FIXTURES_DIR, host='127.0.0.1', port=0):
+        self.companies = [f"company-{i:04d}" for i in range(companies)]
+        self.latency = latency
+        self.pages = load_pages(fixtures_dir)
+        self.requests = 0
+        self._companies_page = companies_page(self.companies)
+        self._known = set(self.companies)
+        self._lock = threading.Lock()
+
+        site = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                site._serve(self)
+
+            def log_message(self, format, *args):
+                pass  # Keep benchmark output clean
+
+        self.server = ThreadingHTTPServer((host, port), Handler)
+        self.server.daemon_threads = True
+        self.url = f"http://{host}:{self.server.server_address[1]}"
+        self._thread = None
+
+    def page_for(self, company):
+        return self.pages[zlib.crc32(company.encode('utf-8')) % len(self.pages)]
+
+    def _serve(self, handler):
+        with self._lock:
+            self.requests += 1
+        if self.latency:
+            time.sleep(self.latency)
+
+        path = handler.path.split('?', 1)[0].rstrip('/')
+        if path == '/companies':
+            body = self._companies_page
+        elif path.startswith('/jobs/') and path[len('/jobs/'):] in self._known:
+            body = self.page_for(path[len('/jobs/'):])
+        else:
+            handler.send_error(404)
+            return
+
+        handler.send_response(200)
+        handler.send_header('Content-Type', 'text/html; charset=utf-8')
+        handler.send_header('Content-Length', str(len(body)))
+        handler.end_headers()
+        handler.wfile.write(body)
+
+    def start(self):
+        self._thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--port', type=int, default=8000)
+    parser.add_argument('--companies', type=int, default=50, help="number of companies listed")
+    parser.add_argument('--latency', type=float, default=0.05, help="seconds added to every response")
+    parser.add_argument('--fixtures', default=FIXTURES_DIR, help="directory of saved .html company pages")
+    args = parser.parse_args()
+
+    site = StandInSite(args.companies, args.latency, args.fixtures, port=args.port)
+    print(f"Serving {len(site.companies)} companies from {len(site.pages)} pages at {site.url}")
+    try:
+        site.server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        site.server.server_close()
+
+
+if __name__ == '__main__':
+    main()
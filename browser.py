@@ -0,0 +1,99 @@
+import threading
+
+try:
+    import psutil
+except ImportError:  # psutil is optional, without it memory use is not reported
+    psutil = None
+
+# Requests a job listing page does not need to render its listings: images,
+# media, fonts, stylesheets and common analytics/tracking scripts
+BLOCKED_URL_PATTERNS = [
+    '*.png', '*.jpg', '*.jpeg', '*.gif', '*.webp', '*.avif', '*.svg', '*.ico',
+    '*.mp4', '*.webm', '*.mp3', '*.woff', '*.woff2', '*.ttf', '*.otf', '*.eot', '*.css',
+    '*google-analytics.com*', '*googletagmanager.com*', '*doubleclick.net*', '*facebook.net*',
+    '*hotjar.com*', '*segment.io*', '*segment.com*', '*intercom.io*', '*fullstory.com*', '*sentry.io*'
+]
+
+
+def configure_lean_options(chrome_options):
+    """Set up Chrome options for lean mode: eager page loads, no images, no background work"""
+    # get() returns at DOMContentLoaded instead of waiting for every subresource
+    chrome_options.page_load_strategy = 'eager'
+    chrome_options.add_argument('--blink-settings=imagesEnabled=false')
+    chrome_options.add_argument('--disable-extensions')
+    chrome_options.add_argument('--disable-background-networking')
+    chrome_options.add_argument('--mute-audio')
+    chrome_options.add_experimental_option('prefs', {
+        'profile.managed_default_content_settings.images': 2,
+        'profile.managed_default_content_settings.fonts': 2
+    })
+
+
+def block_resources(driver, patterns=BLOCKED_URL_PATTERNS):
+    """Block requests matching `patterns` in the driver's tab through the DevTools protocol"""
+    driver.execute_cdp_cmd('Network.enable', {})
+    driver.execute_cdp_cmd('Network.setBlockedURLs', {'urls': list(patterns)})
+
+
+def process_tree_rss(pid):
+    """Resident memory in bytes of a process and all its descendants, or None without psutil"""
+    if psutil is None or pid is None:
+        return None
+    try:
+        process = psutil.Process(pid)
+        processes = [process] + process.children(recursive=True)
+    except psutil.Error:
+        return None
+
+    rss = 0
+    for process in processes:
+        try:
+            rss += process.memory_info().rss
+        except psutil.Error:
+            continue  # Exited while we were looking
+    return rss
+
+
+class BrowserStats:
+    """Page load times and Chrome memory use per worker thread, for sizing hosts"""
+
+    def __init__(self):
+        self._workers = {}
+        self._lock = threading.Lock()
+
+    def _worker(self, name):
+        worker = self._workers.get(name)
+        if worker is None:
+            worker = self._workers[name] = {'loads': 0, 'load_times': [], 'peak_rss': None, 'recycles': 0}
+        return worker
+
+    def record_load(self, seconds, rss=None):
+        """Record one rendered page load by the calling thread and its Chrome's memory use after it"""
+        with self._lock:
+            worker = self._worker(threading.current_thread().name)
+            worker['loads'] += 1
+            worker['load_times'].append(seconds)
+            if rss is not None and (worker['peak_rss'] is None or rss > worker['peak_rss']):
+                worker['peak_rss'] = rss
+
+    def record_recycle(self):
+        with self._lock:
+            self._worker(threading.current_thread().name)['recycles'] += 1
+
+    @property
+    def loads(self):
+        return sum(worker['loads'] for worker in self._workers.values())
+
+    def report(self):
+        lines = ["Browser page loads per worker:"]
+        with self._lock:
+            for name, worker in sorted(self._workers.items()):
+                times = sorted(worker['load_times'])
+                average = sum(times) / len(times)
+                p95 = times[min(len(times) - 1, int(len(times) * 0.95))]
+                rss = f"{worker['peak_rss'] / 2**20:.0f} MiB" if worker['peak_rss'] is not None else "n/a (install psutil)"
+                lines.append(
+                    f"  {name}: {worker['loads']} loads, avg {average:.2f}s, p95 {p95:.2f}s, "
+                    f"max {times[-1]:.2f}s, peak RSS {rss}, {worker['recycles']} recycles"
+                )
+        return '\n'.join(lines)
@@ -0,0 +1,216 @@
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from collections import Counter
+from urllib.parse import parse_qsl, urlencode, urlsplit, urlunsplit
+
+# Query parameters that vary between visits without changing the job
+_TRACKING_PARAMS = re.compile(r'^(utm_\w+|gh_src|ref|source|src|lever-source|trk)$', re.I)
+_WHITESPACE = re.compile(r'\s+')
+# The version at the start of a change log entry
+_VERSION = re.compile(r'\{"version": (\d+)')
+
+# Fields whose change makes a job "updated" rather than a different job
+COMPARED_FIELDS = ('title', 'location', 'url', 'roles')
+
+# Change entries kept, in the JSON change log and in the jobs database
+MAX_LOG_ENTRIES = 100
+
+
+def normalize_url(url):
+    """Canonical form of a job URL: lowercase host, no fragment, tracking parameters or trailing slash"""
+    parts = urlsplit(url.strip())
+    query = urlencode(sorted((key, value) for key, value in parse_qsl(parts.query, keep_blank_values=True)
+                             if not _TRACKING_PARAMS.match(key)))
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path.rstrip('/'), query, ''))
+
+
+def normalize_title(title):
+    return _WHITESPACE.sub(' ', title).strip().lower()
+
+
+def job_id(job, distinguish=False):
+    """Stable id of a job across runs
+
+    A job with its own URL is identified by company and normalized URL, so a
+    retitled posting is the same job. Listings that only link back to the
+    company page are identified by company and normalized title instead.
+    With `distinguish`, the title and location are part of the identity
+    too, for jobs that share a URL or title with others (see assign_ids).
+    """
+    url = job.get('url')
+    if url and url != job.get('scraped_from'):
+        identity = f"url:{normalize_url(url)}"
+    else:
+        identity = f"title:{normalize_title(job['title'])}"
+    if distinguish:
+        identity = f"{identity}\x1ftitle:{normalize_title(job['title'])}\x1flocation:{job.get('location')}"
+    raw = f"{job['company']}\x1f{identity}"
+    return hashlib.sha1(raw.encode('utf-8')).hexdigest()[:16]
+
+
+def assign_ids(jobs):
+    """Set the ids of one company's jobs, dropping only exact duplicates
+
+    Nested job elements can yield the same record twice. Distinct jobs that
+    share an id (e.g. several postings linking to one careers page) get ids
+    that also include their title and location, and an ordinal if even
+    those are the same. Returns the remaining jobs in order.
+    """
+    unique = []
+    seen_records = set()
+    for job in jobs:
+        record = json.dumps(job, sort_keys=True, ensure_ascii=False)
+        if record not in seen_records:
+            seen_records.add(record)
+            unique.append(job)
+
+    base_counts = Counter(job_id(job) for job in unique)
+    seen_ids = set()
+    for job in unique:
+        key = job_id(job)
+        if base_counts[key] > 1:
+            key = job_id(job, distinguish=True)
+        candidate, ordinal = key, 1
+        while candidate in seen_ids:
+            ordinal += 1
+            candidate = f"{key}-{ordinal}"
+        seen_ids.add(candidate)
+        job['id'] = candidate
+    return unique
+
+
+def fields_digest(job):
+    """Short hash of the fields compared between snapshots"""
+    fields = json.dumps([job.get(field) for field in COMPARED_FIELDS], ensure_ascii=False)
+    return hashlib.sha1(fields.encode('utf-8')).digest()[:8]
+
+
+def diff_jobs(previous, current, emit):
+    """Compare two snapshots in linear time, streaming the differences
+
+    `previous` is a function returning a fresh iterator over the previous
+    snapshot. It is read twice, and only each job's id and fields digest
+    are kept in between, so memory does not grow with the size of the jobs.
+    `emit(kind, job)` is called for every job only in `current` ('added'),
+    current version of a job whose compared fields changed ('updated') and
+    job only in `previous` ('removed'). Returns the number of each kind.
+    """
+    before = {job.get('id') or job_id(job): fields_digest(job) for job in previous()}
+    counts = dict.fromkeys(('added', 'removed', 'updated'), 0)
+    for job in current:
+        key = job.get('id') or job_id(job)
+        digest = before.pop(key, None)
+        if digest is None:
+            kind = 'added'
+        elif digest != fields_digest(job):
+            kind = 'updated'
+        else:
+            continue
+        counts[kind] += 1
+        emit(kind, job)
+
+    # What is left in `before` was not seen in `current`
+    if before:
+        for job in previous():
+            key = job.get('id') or job_id(job)
+            if before.pop(key, None) is not None:
+                counts['removed'] += 1
+                emit('removed', {**job, 'id': key})
+    return counts
+
+
+def _line_offsets(f, chunk_size=1 << 16):
+    """Start offsets of the lines of a binary file and its size, without reading whole lines into memory"""
+    offsets = []
+    offset = 0
+    at_line_start = True
+    while True:
+        chunk = f.read(chunk_size)
+        if not chunk:
+            return offsets, offset
+        position = 0
+        while position < len(chunk):
+            if at_line_start:
+                offsets.append(offset + position)
+            newline = chunk.find(b'\n', position)
+            if newline == -1:
+                at_line_start = False
+                break
+            at_line_start = True
+            position = newline + 1
+        offset += len(chunk)
+
+
+class ChangeLog:
+    """JSONL log of the changes between consecutive published snapshots
+
+    Used when jobs are published as a JSON file; the jobs database records
+    its changes per run instead. Each entry has an increasing `version`.
+    Entries are written from streams of jobs and older entries are copied
+    as bytes, so recording a change never holds a whole snapshot in memory.
+    """
+
+    def __init__(self, filename='a16z_sde_jobs.changes.jsonl'):
+        self.filename = filename
+
+    def entries(self):
+        if not os.path.exists(self.filename):
+            return []
+        with open(self.filename, 'r', encoding='utf-8') as f:
+            return [json.loads(line) for line in f if line.strip()]
+
+    def record(self, diff):
+        """Append a diff as the next version, keeping the last MAX_LOG_ENTRIES entries
+
+        `diff` maps 'added', 'removed' and 'updated' to iterables of jobs.
+        """
+        # Imported here because output imports this module
+        from output import atomic_write
+
+        with atomic_write(self.filename, 'wb') as out:
+            version = 1
+            if os.path.exists(self.filename):
+                with open(self.filename, 'rb') as f:
+                    offsets, _ = _line_offsets(f)
+                    if offsets:
+                        # Entries start with their version, see below
+                        f.seek(offsets[-1])
+                        version = int(_VERSION.match(f.read(64).decode('utf-8', 'replace')).group(1)) + 1
+                        f.seek(offsets[-(MAX_LOG_ENTRIES - 1)] if len(offsets) >= MAX_LOG_ENTRIES else 0)
+                        shutil.copyfileobj(f, out)
+
+            out.write(f'{{"version": {version}, "timestamp": {time.time()!r}'.encode('utf-8'))
+            for kind in ('added', 'removed', 'updated'):
+                out.write(f', "{kind}": ['.encode('utf-8'))
+                for i, job in enumerate(diff[kind]):
+                    out.write(((', ' if i else '') + json.dumps(job, ensure_ascii=False)).encode('utf-8'))
+                out.write(b']')
+            out.write(b'}\n')
+        return version
+
+
+def changes_since(entries, since):
+    """API view of change entries newer than version `since`
+
+    `reset` tells the client its version is older than the retained history,
+    so it has to refetch everything instead of applying deltas; no changes
+    are sent with it.
+    """
+    latest = entries[-1]['version'] if entries else 0
+    oldest = entries[0].get('previous', entries[0]['version'] - 1) if entries else 0
+    reset = since < oldest or since > latest
+    return {
+        'version': latest,
+        'reset': reset,
+        'changes': [] if reset else [entry for entry in entries if entry['version'] > since]
+    }
+
+
+def summarize(diff):
+    """One-line summary of a diff, or of the counts diff_jobs() returns"""
+    counts = {kind: value if isinstance(value, int) else len(value) for kind, value in diff.items()}
+    return f"{counts['added']} added, {counts['removed']} removed, {counts['updated']} updated"
@@ -0,0 +1,97 @@
+import hashlib
+import json
+import re
+
+# Role families and the title keywords that identify them. Keywords match
+# anywhere in the lowercased title, like the original SDE keyword filter.
+DEFAULT_TAXONOMY = {
+    'sde': [
+        'software', 'engineer', 'developer', 'sde', 'backend',
+        'frontend', 'full stack', 'fullstack', 'full-stack'
+    ],
+    'ml': [
+        'machine learning', 'ml engineer', 'ml ops', 'mlops', 'ai engineer', 'deep learning',
+        'research scientist', 'research engineer', 'applied scientist', 'computer vision', 'nlp', 'llm'
+    ],
+    'infra': [
+        'infrastructure', 'devops', 'site reliability', 'reliability engineer', 'platform engineer',
+        'cloud', 'kubernetes', 'distributed systems', 'systems engineer', 'network engineer'
+    ],
+    'data': [
+        'data engineer', 'data scientist', 'data science', 'data platform', 'analytics engineer',
+        'data analyst', 'etl'
+    ],
+    'security': [
+        'security', 'appsec', 'infosec', 'penetration', 'cryptograph'
+    ],
+    'mobile': [
+        'mobile', 'ios engineer', 'ios developer', 'android'
+    ]
+}
+
+DEFAULT_INCLUDE = ('sde',)
+
+
+class RoleClassifier:
+    """Tags job titles with role families using one compiled regex over every keyword
+
+    Build it once per run: matching cost stays flat as families and keywords
+    are added, since each title is scanned by a single regex. A title belongs
+    to a family if any of the family's keywords occurs in it.
+    """
+
+    def __init__(self, taxonomy=None, include=DEFAULT_INCLUDE):
+        self.taxonomy = {category: [keyword.lower() for keyword in keywords]
+                         for category, keywords in (taxonomy or DEFAULT_TAXONOMY).items()}
+        self.include = frozenset(include)
+
+        unknown = self.include - set(self.taxonomy)
+        if unknown:
+            raise ValueError(f"Unknown role categories to include: {', '.join(sorted(unknown))}")
+
+        keyword_categories = {}
+        for category, keywords in self.taxonomy.items():
+            for keyword in keywords:
+                keyword_categories.setdefault(keyword, set()).add(category)
+
+        # The regex reports the longest keyword starting at each position, so a
+        # match also carries the categories of every keyword that prefixes it
+        self._categories = {
+            keyword: {category for other, categories in keyword_categories.items()
+                      if keyword.startswith(other) for category in categories}
+            for keyword in keyword_categories
+        }
+        self._order = {category: index for index, category in enumerate(self.taxonomy)}
+
+        alternatives = '|'.join(re.escape(keyword) for keyword in sorted(keyword_categories, key=len, reverse=True))
+        # Zero-width lookahead so overlapping keywords are all found
+        self._pattern = re.compile(f'(?=({alternatives}))') if alternatives else None
+
+        config = json.dumps([self.taxonomy, sorted(self.include)], sort_keys=True)
+        self.signature = hashlib.sha256(config.encode('utf-8')).hexdigest()[:16]
+
+    @classmethod
+    def from_file(cls, filename, include=None):
+        """Load a taxonomy from a JSON file mapping each category to its keywords"""
+        with open(filename, 'r', encoding='utf-8') as f:
+            taxonomy = json.load(f)
+        return cls(taxonomy, include or DEFAULT_INCLUDE)
+
+    def classify(self, title):
+        """Return the categories a title matches, in taxonomy order"""
+        if self._pattern is None:
+            return []
+        found = set()
+        for match in self._pattern.finditer(title.lower()):
+            found |= self._categories[match.group(1)]
+        return sorted(found, key=self._order.__getitem__)
+
+    def classify_many(self, titles):
+        """Classify a batch of titles, classifying each distinct title once"""
+        seen = {}
+        return [seen[title] if title in seen else seen.setdefault(title, self.classify(title))
+                for title in titles]
+
+    def wanted(self, categories):
+        """Whether a job with these categories should be kept"""
+        return not self.include.isdisjoint(categories)
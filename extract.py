@@ -0,0 +1,138 @@
+from collections import namedtuple
+
+from bs4 import BeautifulSoup
+
+try:
+    from lxml import etree, html as lxml_html
+except ImportError:  # lxml is optional, fall back to BeautifulSoup's html.parser
+    lxml_html = None
+
+# One job element found on a company page. `has_link` tells a listing without
+# any <a> apart from one whose <a> has no href (href is None in both cases).
+Listing = namedtuple('Listing', ['title', 'location', 'has_link', 'href'])
+
+# Tags tried, in order, as job elements whose class mentions "job"
+JOB_ELEMENT_TAGS = ('div', 'a', 'li')
+
+
+class HtmlParserEngine:
+    """The original extraction path: BeautifulSoup with the pure-Python html.parser"""
+    name = 'html.parser'
+
+    def extract(self, html):
+        """Return the listings on a page, or None if it has no job elements"""
+        soup = BeautifulSoup(html, 'html.parser')
+
+        # Try multiple possible selectors for job listings
+        job_elements = (
+            soup.find_all('div', class_=lambda x: x and 'job' in x.lower()) or
+            soup.find_all('a', class_=lambda x: x and 'job' in x.lower()) or
+            soup.find_all('li', class_=lambda x: x and 'job' in x.lower())
+        )
+
+        if not job_elements:
+            return None
+
+        listings = []
+        for job_element in job_elements:
+            job_title = job_element.find(['h2', 'h3', 'h4', 'a'])
+            job_location = job_element.find(class_=lambda x: x and ('location' in str(x).lower() or 'city' in str(x).lower()))
+            job_link = job_element.find('a')
+            listings.append(Listing(
+                title=job_title.get_text(strip=True) if job_title is not None else None,
+                location=job_location.get_text(strip=True) if job_location is not None else None,
+                has_link=job_link is not None,
+                href=job_link.get('href') if job_link is not None else None
+            ))
+        return listings
+
+
+def _lower(expression):
+    """XPath 1.0 has no lower-case(), translate ASCII letters instead"""
+    return f"translate({expression}, 'ABCDEFGHIJKLMNOPQRSTUVWXYZ', 'abcdefghijklmnopqrstuvwxyz')"
+
+
+class LxmlEngine:
+    """Single-pass extraction on lxml's C parser with precompiled XPath lookups
+
+    The document is walked once to collect div/a/li job elements together,
+    instead of up to three full-tree scans. Produces the same listings as
+    HtmlParserEngine for well-formed pages; for badly broken markup the two
+    parsers may repair the tree differently.
+    """
+    name = 'lxml'
+
+    if lxml_html is not None:
+        _title = etree.XPath('(descendant::h2 | descendant::h3 | descendant::h4 | descendant::a)[1]')
+        _location = etree.XPath(
+            f"descendant::*[contains({_lower('@class')}, 'location') or contains({_lower('@class')}, 'city')][1]"
+        )
+        _link = etree.XPath('descendant::a[1]')
+
+    def extract(self, html):
+        """Return the listings on a page, or None if it has no job elements"""
+        if not html.strip():
+            return None
+        root = lxml_html.document_fromstring(html)
+
+        found = {tag: [] for tag in JOB_ELEMENT_TAGS}
+        for element in root.iter(*JOB_ELEMENT_TAGS):
+            if 'job' in (element.get('class') or '').lower():
+                found[element.tag].append(element)
+
+        job_elements = found['div'] or found['a'] or found['li']
+        if not job_elements:
+            return None
+
+        listings = []
+        for job_element in job_elements:
+            job_title = self._first(self._title(job_element))
+            job_location = self._first(self._location(job_element))
+            job_link = self._first(self._link(job_element))
+            listings.append(Listing(
+                title=_text(job_title) if job_title is not None else None,
+                location=_text(job_location) if job_location is not None else None,
+                has_link=job_link is not None,
+                href=job_link.get('href') if job_link is not None else None
+            ))
+        return listings
+
+    @staticmethod
+    def _first(elements):
+        return elements[0] if elements else None
+
+
+def _text(element):
+    """Equivalent of BeautifulSoup's get_text(strip=True): stripped text pieces, joined
+
+    Comments and the contents of script/style/template elements are skipped,
+    as they are by BeautifulSoup.
+    """
+    return ''.join(piece for piece in (part.strip() for part in _in_document_order(element)) if piece)
+
+
+def _in_document_order(element):
+    """Yield an element's text nodes in document order"""
+    if isinstance(element.tag, str) and element.tag not in ('script', 'style', 'template') and element.text:
+        yield element.text
+    for child in element:
+        yield from _in_document_order(child)
+        if child.tail:
+            yield child.tail
+
+
+ENGINES = {
+    HtmlParserEngine.name: HtmlParserEngine,
+    LxmlEngine.name: LxmlEngine
+}
+
+
+def get_engine(name=None):
+    """Return an extraction engine by name, defaulting to the fastest one installed"""
+    if name is None:
+        name = LxmlEngine.name if lxml_html is not None else HtmlParserEngine.name
+    if name not in ENGINES:
+        raise ValueError(f"Unknown extraction engine {name!r}, expected one of {', '.join(ENGINES)}")
+    if name == LxmlEngine.name and lxml_html is None:
+        raise ValueError("The lxml extraction engine needs the lxml package installed")
+    return ENGINES[name]()
@@ -0,0 +1,306 @@
+import json
+import os
+import statistics
+import struct
+import sys
+import threading
+import time
+import zlib
+from array import array
+from collections import Counter, OrderedDict
+
+from changes import job_id
+from output import atomic_write
+
+MAGIC = b'A16ZCOL2'
+# Segments written before each column's dictionary was stored on its own, in the header
+MAGIC_V1 = b'A16ZCOL1'
+
+# Dictionary-encoded columns stored for every job
+COLUMNS = ('id', 'company', 'title', 'location', 'roles')
+# Columns holding several values per job, stored joined with MULTI_VALUE_SEPARATOR
+MULTI_VALUED = ('roles',)
+MULTI_VALUE_SEPARATOR = ';'
+
+DAY = 86400
+
+
+def _encode_column(values):
+    """Dictionary-encode a column: the distinct values in first-seen order and one code per row"""
+    dictionary = {}
+    codes = [dictionary.setdefault(value, len(dictionary)) for value in values]
+    typecode = 'B' if len(dictionary) <= 0xFF else 'H' if len(dictionary) <= 0xFFFF else 'I'
+    return list(dictionary), array(typecode, codes)
+
+
+class Segment:
+    """The columns of one run, read from its segment file
+
+    Each column is a list of distinct values (its dictionary) and an array
+    of small integer codes, one per job, so aggregates are counts over the
+    code arrays and only distinct values are ever Python strings. Both
+    halves of a column stay compressed until a query first uses them.
+    """
+
+    def __init__(self, run_id, timestamp, rows, columns, byteorder=sys.byteorder):
+        self.run_id = run_id
+        self.timestamp = timestamp
+        self.rows = rows
+        # name -> (typecode, compressed dictionary, compressed codes)
+        self._columns = columns
+        self._byteorder = byteorder
+        self._dictionaries = {}
+        self._codes = {}
+        self._lock = threading.Lock()
+
+    def dictionary(self, column):
+        """The distinct values of a column, decompressed on first use"""
+        with self._lock:
+            values = self._dictionaries.get(column)
+            if values is None:
+                blob = self._columns[column][1]
+                # Version 1 segments hold the decoded dictionary already
+                values = blob if isinstance(blob, list) else json.loads(zlib.decompress(blob))
+                self._dictionaries[column] = values
+            return values
+
+    def codes(self, column):
+        """The code array of a column, decompressed on first use"""
+        with self._lock:
+            values = self._codes.get(column)
+            if values is None:
+                typecode, _, blob = self._columns[column]
+                values = array(typecode)
+                values.frombytes(zlib.decompress(blob))
+                if self._byteorder != sys.byteorder:
+                    values.byteswap()
+                self._codes[column] = values
+            return values
+
+    def _decode_counts(self, column, counter):
+        """Counts per dictionary code as counts per value; multi-valued entries count once per value"""
+        dictionary = self.dictionary(column)
+        if column not in MULTI_VALUED:
+            return {dictionary[code]: count for code, count in counter.items()}
+        counts = Counter()
+        for code, count in counter.items():
+            for value in dictionary[code].split(MULTI_VALUE_SEPARATOR):
+                if value:
+                    counts[value] += count
+        return dict(counts)
+
+    def counts(self, column):
+        """Jobs per distinct value of a column"""
+        return self._decode_counts(column, Counter(self.codes(column)))
+
+    def counts_where(self, column, where_column, where_value):
+        """Jobs per value of `column` among the jobs whose `where_column` is `where_value`"""
+        try:
+            wanted = self.dictionary(where_column).index(where_value)
+        except ValueError:
+            return {}
+        counter = Counter(code for code, where in zip(self.codes(column), self.codes(where_column)) if where == wanted)
+        return self._decode_counts(column, counter)
+
+    @classmethod
+    def write(cls, filename, run_id, timestamp, jobs):
+        """Write jobs as a compressed columnar segment file; returns the number of rows"""
+        columns = {name: [] for name in COLUMNS}
+        for job in jobs:
+            for name in COLUMNS:
+                value = job.get(name)
+                if name == 'id':
+                    value = value or job_id(job)
+                elif name in MULTI_VALUED:
+                    value = MULTI_VALUE_SEPARATOR.join(value or [])
+                columns[name].append(value if value is not None else '')
+
+        header = {'run_id': run_id, 'timestamp': timestamp, 'rows': len(columns['id']),
+                  'byteorder': sys.byteorder, 'columns': {}}
+        blobs = []
+        for name in COLUMNS:
+            dictionary, codes = _encode_column(columns[name])
+            dictionary_blob = zlib.compress(json.dumps(dictionary, ensure_ascii=False).encode('utf-8'), 6)
+            codes_blob = zlib.compress(codes.tobytes(), 6)
+            header['columns'][name] = {'typecode': codes.typecode, 'dictionary_bytes': len(dictionary_blob),
+                                       'bytes': len(codes_blob)}
+            blobs.extend((dictionary_blob, codes_blob))
+
+        header_blob = zlib.compress(json.dumps(header, ensure_ascii=False).encode('utf-8'), 6)
+        with atomic_write(filename, 'wb') as f:
+            f.write(MAGIC)
+            f.write(struct.pack('<I', len(header_blob)))
+            f.write(header_blob)
+            for blob in blobs:
+                f.write(blob)
+        return header['rows']
+
+    @classmethod
+    def read(cls, filename):
+        """Read a segment's header and compressed columns; nothing is decompressed until a query needs it"""
+        with open(filename, 'rb') as f:
+            magic = f.read(len(MAGIC))
+            if magic not in (MAGIC, MAGIC_V1):
+                raise ValueError(f"{filename} is not a snapshot segment")
+            header_length, = struct.unpack('<I', f.read(4))
+            header = json.loads(zlib.decompress(f.read(header_length)))
+            columns = {}
+            for name, column in header['columns'].items():
+                if magic == MAGIC_V1:
+                    dictionary = column['dictionary']
+                else:
+                    dictionary = f.read(column['dictionary_bytes'])
+                columns[name] = (column['typecode'], dictionary, f.read(column['bytes']))
+        return cls(header['run_id'], header['timestamp'], header['rows'], columns, header['byteorder'])
+
+
+class SnapshotStore:
+    """Append-only history of every run's jobs in compressed columnar segments
+
+    Each run is one immutable segment file (run-000042.col) of
+    dictionary-encoded, zlib-compressed columns, listed with its run id and
+    timestamp in manifest.json. Trend queries decompress only the columns
+    they need from each segment and count codes, without building a dict
+    per job. Segments are kept in an LRU cache, and query results are
+    cached until the next run is appended.
+    """
+
+    SEGMENT_CACHE_SIZE = 64
+    RESULT_CACHE_SIZE = 128
+
+    def __init__(self, dirname='a16z_history'):
+        self.dirname = dirname
+        self.manifest_filename = os.path.join(dirname, 'manifest.json')
+        self._manifest = None
+        self._manifest_key = None
+        self._segments = OrderedDict()
+        self._results = OrderedDict()
+        self._lock = threading.Lock()
+
+    def runs(self):
+        """The manifest entries of every stored run, oldest first"""
+        try:
+            stat = os.stat(self.manifest_filename)
+        except FileNotFoundError:
+            return []
+        key = (stat.st_mtime_ns, stat.st_size, stat.st_ino)
+        with self._lock:
+            if key != self._manifest_key:
+                with open(self.manifest_filename, 'r', encoding='utf-8') as f:
+                    self._manifest = json.load(f)['runs']
+                self._manifest_key = key
+                self._results.clear()
+            return self._manifest
+
+    def append(self, jobs, timestamp=None):
+        """Store a run's jobs as the next segment; returns its run id"""
+        os.makedirs(self.dirname, exist_ok=True)
+        runs = list(self.runs())
+        run_id = runs[-1]['run_id'] + 1 if runs else 1
+        timestamp = timestamp or time.time()
+        filename = f"run-{run_id:06d}.col"
+        rows = Segment.write(os.path.join(self.dirname, filename), run_id, timestamp, jobs)
+        runs.append({'run_id': run_id, 'timestamp': timestamp, 'rows': rows, 'file': filename})
+
+        with atomic_write(self.manifest_filename) as f:
+            json.dump({'runs': runs}, f, indent=2)
+        return run_id
+
+    def segment(self, run):
+        filename = os.path.join(self.dirname, run['file'])
+        with self._lock:
+            segment = self._segments.get(filename)
+            if segment is not None:
+                self._segments.move_to_end(filename)
+                return segment
+        segment = Segment.read(filename)
+        with self._lock:
+            self._segments[filename] = segment
+            if len(self._segments) > self.SEGMENT_CACHE_SIZE:
+                self._segments.popitem(last=False)
+        return segment
+
+    def _cached(self, query, compute):
+        """Result of `compute()` for `query`, computed once per version of the manifest"""
+        self.runs()
+        with self._lock:
+            if query in self._results:
+                self._results.move_to_end(query)
+                return self._results[query]
+        result = compute()
+        with self._lock:
+            self._results[query] = result
+            if len(self._results) > self.RESULT_CACHE_SIZE:
+                self._results.popitem(last=False)
+        return result
+
+    def counts_over_time(self, column, last=30, top=10, where=None):
+        """Job counts per value of `column` in each of the last runs
+
+        Returns the runs and a series per value, aligned with the runs, for
+        the `top` values with the most jobs in the latest run, then overall.
+        `where` is an optional (column, value) filter, such as one company.
+        """
+        def compute():
+            runs = self.runs()[-last:]
+            per_run = []
+            for run in runs:
+                segment = self.segment(run)
+                if where:
+                    per_run.append(segment.counts_where(column, *where))
+                else:
+                    per_run.append(segment.counts(column))
+
+            latest = per_run[-1] if per_run else {}
+            totals = Counter()
+            for counts in per_run:
+                totals.update(counts)
+            values = sorted(totals, key=lambda value: (latest.get(value, 0), totals[value]), reverse=True)[:top]
+            return {
+                'runs': [{'run_id': run['run_id'], 'timestamp': run['timestamp'], 'jobs': run['rows']} for run in runs],
+                'series': {value: [counts.get(value, 0) for counts in per_run] for value in values}
+            }
+        return self._cached(('counts', column, last, top, where), compute)
+
+    def time_to_fill(self, company=None, top=10):
+        """How long postings stay up, from the run a job id first appears to the first run without it
+
+        Jobs still posted in the latest run are open and not counted as
+        filled. Returns overall median and mean days, and per company for
+        the `top` companies with the most filled postings.
+        """
+        def compute():
+            first_seen = {}
+            filled = {}
+            previous = set()
+            previous_company = {}
+            for run in self.runs():
+                segment = self.segment(run)
+                ids = segment.dictionary('id')
+                companies = segment.dictionary('company')
+                # A job id occurs once per run, so the id dictionary is the run's set of jobs
+                current = set(ids)
+                for job_id in current - first_seen.keys():
+                    first_seen[job_id] = run['timestamp']
+                for job_id in previous - current:
+                    filled[job_id] = (previous_company[job_id], (run['timestamp'] - first_seen.pop(job_id)) / DAY)
+                company_of = {}
+                for id_code, company_code in zip(segment.codes('id'), segment.codes('company')):
+                    company_of[ids[id_code]] = companies[company_code]
+                previous, previous_company = current, company_of
+
+            durations = [days for job_company, days in filled.values() if company is None or job_company == company]
+            by_company = {}
+            for job_company, days in filled.values():
+                by_company.setdefault(job_company, []).append(days)
+            ranked = sorted(by_company.items(), key=lambda item: len(item[1]), reverse=True)[:top]
+            open_jobs = [job_id for job_id in previous if company is None or previous_company[job_id] == company]
+            return {
+                'filled': len(durations),
+                'open': len(open_jobs),
+                'median_days': round(statistics.median(durations), 2) if durations else None,
+                'mean_days': round(statistics.fmean(durations), 2) if durations else None,
+                'by_company': {name: {'filled': len(days), 'median_days': round(statistics.median(days), 2)}
+                               for name, days in ranked} if company is None else {}
+            }
+        return self._cached(('time_to_fill', company, top), compute)
@@ -0,0 +1,98 @@
+import bisect
+import re
+
+_TOKEN = re.compile(r'[a-z0-9]+')
+
+DEFAULT_LIMIT = 50
+MAX_LIMIT = 500
+
+
+def tokenize(text):
+    """Lowercase alphanumeric tokens of a piece of text"""
+    return _TOKEN.findall(text.lower())
+
+
+class JobsIndex:
+    """In-memory search indexes over one version of the jobs data
+
+    Built once per data load: an inverted index from title/company tokens to
+    job positions, plus hash indexes on the exact company and location.
+    Every query token must prefix-match a token of the job's title or
+    company, so "back eng" finds "Backend Engineer". Results keep the
+    order of the jobs data.
+    """
+
+    def __init__(self, jobs):
+        self.jobs = jobs
+        postings = {}
+        self.by_company = {}
+        self.by_location = {}
+
+        for position, job in enumerate(jobs):
+            for token in set(tokenize(f"{job.get('title', '')} {job.get('company', '')}")):
+                postings.setdefault(token, []).append(position)
+            self.by_company.setdefault(job.get('company'), []).append(position)
+            self.by_location.setdefault(job.get('location'), []).append(position)
+
+        self.postings = postings
+        self.vocabulary = sorted(postings)
+
+    def _prefix_matches(self, prefix):
+        """Positions of jobs with a token starting with `prefix`"""
+        start = bisect.bisect_left(self.vocabulary, prefix)
+        matches = set()
+        for token in self.vocabulary[start:]:
+            if not token.startswith(prefix):
+                break
+            matches.update(self.postings[token])
+        return matches
+
+    def search(self, q=None, company=None, location=None):
+        """Positions of the jobs matching every given filter, in data order"""
+        candidates = []
+        if company:
+            candidates.append(set(self.by_company.get(company, ())))
+        if location:
+            candidates.append(set(self.by_location.get(location, ())))
+        for token in tokenize(q or ''):
+            candidates.append(self._prefix_matches(token))
+
+        if not candidates:
+            return range(len(self.jobs))
+
+        # Intersect starting from the most selective filter
+        candidates.sort(key=len)
+        matches = candidates[0].intersection(*candidates[1:])
+        return sorted(matches)
+
+    def query(self, q=None, company=None, location=None, offset=0, limit=DEFAULT_LIMIT):
+        """One page of matching jobs with the total match count"""
+        positions = self.search(q, company, location)
+        page = positions[offset:offset + limit]
+        next_offset = offset + limit
+        return {
+            'jobs': [self.jobs[position] for position in page],
+            'total': len(positions),
+            'offset': offset,
+            'page': offset // limit + 1,
+            'limit': limit,
+            'next_cursor': str(next_offset) if next_offset < len(positions) else None
+        }
+
+
+def parse_page_args(args):
+    """Read offset and limit from `limit` plus either `cursor` or a 1-based `page`
+
+    Raises ValueError for malformed or out-of-range values.
+    """
+    limit = int(args.get('limit', DEFAULT_LIMIT))
+    if not 1 <= limit <= MAX_LIMIT:
+        raise ValueError(f"limit must be between 1 and {MAX_LIMIT}")
+
+    if args.get('cursor'):
+        offset = int(args['cursor'])
+    else:
+        offset = (int(args.get('page', 1)) - 1) * limit
+    if offset < 0:
+        raise ValueError("page and cursor must not be negative")
+    return offset, limit
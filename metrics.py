@@ -0,0 +1,180 @@
+import json
+import math
+import threading
+import time
+from contextlib import contextmanager
+
+from output import atomic_write
+
+# Phases of scraping one company, in the order they happen
+PHASES = ('navigation', 'wait', 'parse', 'classify', 'save')
+
+# Prometheus' default latency buckets, in seconds
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+
+class ScrapeMetrics:
+    """Per-company phase timings and counters of one scrape run
+
+    Worker threads attribute their timings to the company they are working
+    on, set with company(). Timings recorded outside of a company (such as
+    loading the companies list) only count towards the phase totals.
+    """
+
+    def __init__(self):
+        self.started_at = time.time()
+        self.phase_totals = dict.fromkeys(PHASES, 0.0)
+        self.companies = {}
+        self.counters = {}
+        self._lock = threading.Lock()
+        self._local = threading.local()
+
+    @contextmanager
+    def company(self, name):
+        """Attribute timings recorded by the calling thread to company `name`"""
+        previous = getattr(self._local, 'company', None)
+        self._local.company = name
+        try:
+            yield
+        finally:
+            self._local.company = previous
+
+    @contextmanager
+    def phase(self, name):
+        """Time the enclosed block as phase `name` of the calling thread's company"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, time.perf_counter() - start)
+
+    def record(self, phase, seconds, company=None):
+        company = company or getattr(self._local, 'company', None)
+        with self._lock:
+            self.phase_totals[phase] = self.phase_totals.get(phase, 0.0) + seconds
+            if company is not None:
+                phases = self._company(company)['phases']
+                phases[phase] = phases.get(phase, 0.0) + seconds
+
+    def record_jobs(self, company, count):
+        with self._lock:
+            self._company(company)['jobs'] = count
+            self.counters['jobs_found'] = self.counters.get('jobs_found', 0) + count
+
+    def company_seconds(self, company):
+        """Total time recorded for a company so far"""
+        with self._lock:
+            entry = self.companies.get(company)
+            return sum(entry['phases'].values()) if entry else 0.0
+
+    def count(self, name, amount=1):
+        with self._lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def _company(self, company):
+        entry = self.companies.get(company)
+        if entry is None:
+            entry = self.companies[company] = {'jobs': 0, 'phases': {}}
+        return entry
+
+    def summary(self, **extra):
+        """The run summary: totals, counters and per-company timings, slowest company first"""
+        finished_at = time.time()
+        with self._lock:
+            companies = [
+                {'company': company, 'jobs': entry['jobs'],
+                 'seconds': round(sum(entry['phases'].values()), 4),
+                 'phases': {phase: round(seconds, 4) for phase, seconds in entry['phases'].items()}}
+                for company, entry in self.companies.items()
+            ]
+            counters = dict(self.counters)
+            phase_totals = {phase: round(seconds, 4) for phase, seconds in self.phase_totals.items()}
+        companies.sort(key=lambda entry: entry['seconds'], reverse=True)
+        return {
+            'started_at': self.started_at,
+            'finished_at': finished_at,
+            'duration_seconds': round(finished_at - self.started_at, 3),
+            **extra,
+            'counters': counters,
+            'phase_seconds': phase_totals,
+            'companies': companies
+        }
+
+    def write_summary(self, filename, **extra):
+        """Atomically write the run summary as JSON"""
+        summary = self.summary(**extra)
+        with atomic_write(filename) as f:
+            json.dump(summary, f, indent=2, ensure_ascii=False)
+        return summary
+
+    def report(self, top=5):
+        """A short human-readable digest of where the time went"""
+        summary = self.summary()
+        phases = ', '.join(f"{phase} {seconds:.1f}s" for phase, seconds in summary['phase_seconds'].items())
+        counters = ', '.join(f"{name} {value}" for name, value in sorted(summary['counters'].items()))
+        lines = [f"Time by phase: {phases}", f"Counters: {counters or 'none'}"]
+        if summary['companies']:
+            lines.append("Slowest companies:")
+            for entry in summary['companies'][:top]:
+                lines.append(f"  {entry['company']}: {entry['seconds']:.2f}s ({entry['jobs']} jobs)")
+        return '\n'.join(lines)
+
+
+def _format_labels(labelnames, values, **extra):
+    pairs = list(zip(labelnames, values)) + list(extra.items())
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{' + ','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped)) + '}'
+
+
+def _format_value(value):
+    if value == math.inf:
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """A Prometheus histogram with optional labels, rendered in the text exposition format"""
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self.buckets = tuple(buckets) + (math.inf,)
+        self._series = {}
+        self._lock = threading.Lock()
+
+    def observe(self, value, *labels):
+        with self._lock:
+            series = self._series.get(labels)
+            if series is None:
+                series = self._series[labels] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series['counts'][i] += 1
+                    break
+            series['sum'] += value
+            series['count'] += 1
+
+    def render(self):
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            for labels, series in sorted(self._series.items()):
+                cumulative = 0
+                for bound, count in zip(self.buckets, series['counts']):
+                    cumulative += count
+                    lines.append(f"{self.name}_bucket{_format_labels(self.labelnames, labels, le=_format_value(bound))} "
+                                 f"{cumulative}")
+                lines.append(f"{self.name}_sum{_format_labels(self.labelnames, labels)} {_format_value(series['sum'])}")
+                lines.append(f"{self.name}_count{_format_labels(self.labelnames, labels)} {series['count']}")
+        return lines
+
+
+def render_samples(name, documentation, kind, samples):
+    """Exposition lines of a gauge or counter from (labels dict, value) samples; None values are skipped"""
+    lines = [f"# HELP {name} {documentation}", f"# TYPE {name} {kind}"]
+    for labels, value in samples:
+        if value is not None:
+            lines.append(f"{name}{_format_labels(tuple(labels), tuple(labels.values()))} {_format_value(value)}")
+    return lines
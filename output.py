@@ -0,0 +1,207 @@
+import csv
+import json
+import os
+import tempfile
+import textwrap
+import threading
+from contextlib import contextmanager, suppress
+
+from changes import ChangeLog, diff_jobs, summarize
+
+
+def csv_row(job):
+    """Flatten a job for CSV output"""
+    return {**job, 'roles': ';'.join(job.get('roles', []))}
+
+
+@contextmanager
+def atomic_write(filename, mode='w', encoding='utf-8', newline=None):
+    """Open a temporary file that replaces `filename` once the block finishes
+
+    The file is fsynced before the replace, so after a crash `filename` is
+    either the old or the new version in full. If the block raises, the
+    temporary file is removed and `filename` is left as it was.
+    """
+    tmp_filename = f"{filename}.tmp"
+    try:
+        with open(tmp_filename, mode, encoding=None if 'b' in mode else encoding, newline=newline) as f:
+            yield f
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        with suppress(FileNotFoundError):
+            os.remove(tmp_filename)
+        raise
+
+
+def write_json_atomic(filename, jobs):
+    """Stream jobs into a JSON array with the same layout as json.dump(indent=2), then atomically replace `filename`"""
+    count = 0
+    with atomic_write(filename) as f:
+        f.write('[')
+        for job in jobs:
+            f.write(',\n' if count else '\n')
+            f.write(textwrap.indent(json.dumps(job, indent=2, ensure_ascii=False), '  '))
+            count += 1
+        f.write('\n]' if count else ']')
+    return count
+
+
+def iter_json_array(filename, chunk_size=1 << 16):
+    """Stream the items of a JSON array file one at a time, reading it in chunks"""
+    decoder = json.JSONDecoder()
+    with open(filename, 'r', encoding='utf-8') as f:
+        buffer = ''
+        started = False
+        while True:
+            chunk = f.read(chunk_size)
+            buffer += chunk
+            position = 0
+            while True:
+                # Skip the opening bracket, whitespace and separators between items
+                while position < len(buffer) and (buffer[position] in ' \t\r\n,' or
+                                                  (not started and buffer[position] == '[')):
+                    started = started or buffer[position] == '['
+                    position += 1
+                if position < len(buffer) and buffer[position] == ']':
+                    return
+                try:
+                    item, position = decoder.raw_decode(buffer, position)
+                except ValueError:
+                    break  # The item continues in the next chunk
+                yield item
+            buffer = buffer[position:]
+            if not chunk:
+                if buffer.strip():
+                    raise ValueError(f"{filename} is not a complete JSON array")
+                return
+
+
+def write_csv_atomic(filename, jobs):
+    """Stream jobs into a CSV file, then atomically replace `filename`; nothing is written without jobs"""
+    jobs = iter(jobs)
+    first = next(jobs, None)
+    if first is None:
+        return 0
+
+    count = 1
+    with atomic_write(filename, newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=first.keys())
+        writer.writeheader()
+        writer.writerow(csv_row(first))
+        for job in jobs:
+            writer.writerow(csv_row(job))
+            count += 1
+    return count
+
+
+class JobStreamWriter:
+    """Crash-safe, append-only job output with resume checkpoints
+
+    Each company's jobs are appended to a JSONL file and fsynced as soon as
+    they are scraped, then the company is appended to a checkpoint file
+    together with the JSONL size at that point. A restarted run skips
+    checkpointed companies and truncates any jobs written after the last
+    checkpoint, so no company is ever written twice. finalize() streams the
+    JSONL into the JSON and CSV outputs and records what changed since the
+    previous JSON output in the change log, streaming that output too, so
+    memory use does not grow with the number of jobs beyond an id and a
+    short digest per previous job.
+    """
+
+    def __init__(self, json_filename='a16z_sde_jobs.json', csv_filename='a16z_sde_jobs.csv', resume=True):
+        self.json_filename = json_filename
+        self.csv_filename = csv_filename
+        base = os.path.splitext(json_filename)[0]
+        self.jsonl_filename = f"{base}.jsonl"
+        self.checkpoint_filename = f"{base}.checkpoint"
+        self.change_log = ChangeLog(f"{base}.changes.jsonl")
+        self.company_counts = {}
+        self._lock = threading.Lock()
+
+        entries = []
+        if resume and os.path.exists(self.checkpoint_filename):
+            with open(self.checkpoint_filename, 'r', encoding='utf-8') as f:
+                for line in f:
+                    try:
+                        entries.append(json.loads(line))
+                    except ValueError:
+                        break  # Torn write from a crash, everything after it is lost
+
+        if entries:
+            print(f"Resuming: {len(entries)} companies already scraped")
+
+        # Drop jobs written after the last checkpoint
+        self._jsonl = open(self.jsonl_filename, 'a+b')
+        self._jsonl.truncate(entries[-1]['offset'] if entries else 0)
+
+        # Rewrite the checkpoint without any torn trailing line
+        self._checkpoint = open(self.checkpoint_filename, 'w', encoding='utf-8')
+        for entry in entries:
+            self._checkpoint.write(json.dumps(entry) + '\n')
+            self.company_counts[entry['company']] = entry['jobs']
+        self._checkpoint.flush()
+
+    def is_done(self, company):
+        """Whether a previous, interrupted run already wrote this company's jobs"""
+        return company in self.company_counts
+
+    def write_company(self, company, jobs):
+        """Durably append a company's jobs and checkpoint the company"""
+        data = ''.join(json.dumps(job, ensure_ascii=False) + '\n' for job in jobs).encode('utf-8')
+        with self._lock:
+            self._jsonl.write(data)
+            self._jsonl.flush()
+            os.fsync(self._jsonl.fileno())
+
+            entry = {'company': company, 'jobs': len(jobs), 'offset': self._jsonl.tell()}
+            self._checkpoint.write(json.dumps(entry) + '\n')
+            self._checkpoint.flush()
+            os.fsync(self._checkpoint.fileno())
+            self.company_counts[company] = len(jobs)
+
+    def iter_jobs(self):
+        """Stream the jobs written so far"""
+        with open(self.jsonl_filename, 'r', encoding='utf-8') as f:
+            for line in f:
+                yield json.loads(line)
+
+    @property
+    def total_jobs(self):
+        return sum(self.company_counts.values())
+
+    def finalize(self):
+        """Atomically publish the JSON and CSV outputs and end the resumable run"""
+        with self._lock:
+            self._jsonl.close()
+            self._checkpoint.close()
+
+        def previous():
+            if os.path.exists(self.json_filename):
+                yield from iter_json_array(self.json_filename)
+
+        # Changed jobs are spooled to temporary files rather than kept in memory
+        spools = {kind: tempfile.TemporaryFile('w+', encoding='utf-8') for kind in ('added', 'removed', 'updated')}
+        try:
+            counts = diff_jobs(previous, self.iter_jobs(),
+                               lambda kind, job: spools[kind].write(json.dumps(job, ensure_ascii=False) + '\n'))
+            for spool in spools.values():
+                spool.seek(0)
+            version = self.change_log.record({kind: (json.loads(line) for line in spool)
+                                              for kind, spool in spools.items()})
+        finally:
+            for spool in spools.values():
+                spool.close()
+        print(f"\nChanges since the last run (version {version}): {summarize(counts)}")
+
+        count = write_json_atomic(self.json_filename, self.iter_jobs())
+        print(f"\nSaved {count} jobs to {self.json_filename}")
+        if write_csv_atomic(self.csv_filename, self.iter_jobs()):
+            print(f"Saved {count} jobs to {self.csv_filename}")
+        else:
+            print("No jobs to save")
+
+        # The run is complete, the next one starts from scratch
+        os.remove(self.checkpoint_filename)
+        return count
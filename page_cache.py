@@ -0,0 +1,114 @@
+import hashlib
+import json
+import os
+import re
+import threading
+
+from output import atomic_write
+
+# Markup that changes between loads without the listings changing
+_VOLATILE = re.compile(r'<script\b.*?</script>|<style\b.*?</style>|<noscript\b.*?</noscript>|<!--.*?-->', re.S | re.I)
+_BODY = re.compile(r'<body\b.*</body>', re.S | re.I)
+_WHITESPACE = re.compile(r'\s+')
+
+
+def fingerprint_html(html):
+    """Hash the visible <body> markup of a page, ignoring scripts, styles, comments and whitespace"""
+    body = _BODY.search(html)
+    region = _VOLATILE.sub('', body.group(0) if body else html)
+    return hashlib.sha256(_WHITESPACE.sub('', region).encode('utf-8')).hexdigest()
+
+
+class PageCache:
+    """Persistent per-company page fingerprints and the jobs parsed from them
+
+    An entry records where the page came from ('http' or 'browser'), its
+    content fingerprint, the ETag/Last-Modified validators of HTTP fetches and
+    the jobs parsed from it, so an unchanged page can reuse those jobs without
+    being parsed again. Entries also record the signature of the role
+    classifier that filtered the jobs; a different signature is a miss.
+    With reuse=False every page counts as changed, but the cache is still
+    refreshed for the next run.
+    """
+
+    def __init__(self, filename='a16z_page_cache.json', reuse=True):
+        self.filename = filename
+        self.reuse = reuse
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self._entries = {}
+
+        if os.path.exists(filename):
+            try:
+                with open(filename, 'r', encoding='utf-8') as f:
+                    self._entries = json.load(f)
+            except Exception as e:
+                print(f"Error loading page cache, starting empty: {e}")
+
+    def _entry(self, company, source, signature):
+        entry = self._entries.get(company)
+        if not self.reuse or not entry or entry.get('source') != source or entry.get('signature') != signature:
+            return None
+        return entry
+
+    def conditional_headers(self, company, signature=None):
+        """Validators for a conditional HTTP request, if the last fetch was over HTTP"""
+        entry = self._entry(company, 'http', signature)
+        if not entry:
+            return {}
+
+        headers = {}
+        if entry.get('etag'):
+            headers['If-None-Match'] = entry['etag']
+        if entry.get('last_modified'):
+            headers['If-Modified-Since'] = entry['last_modified']
+        return headers
+
+    def lookup(self, company, source, signature=None, fingerprint=None, not_modified=False):
+        """Return the cached jobs if the page is unchanged, otherwise None
+
+        The page is unchanged if the server answered 304 Not Modified, or if
+        its fingerprint matches the one recorded from the same source.
+        """
+        entry = self._entry(company, source, signature)
+        if not entry:
+            return None
+        if not_modified or (fingerprint and entry.get('fingerprint') == fingerprint):
+            with self._lock:
+                self.hits += 1
+            return [dict(job) for job in entry['jobs']]
+        return None
+
+    def previous_jobs(self, company, signature=None):
+        """The jobs last recorded for a company, without checking its page, or None
+
+        Used for companies the scheduler skips this run.
+        """
+        entry = self._entries.get(company)
+        if not self.reuse or not entry or entry.get('signature') != signature:
+            return None
+        return [dict(job) for job in entry['jobs']]
+
+    def store(self, company, source, fingerprint, jobs, etag=None, last_modified=None, signature=None):
+        """Record a freshly parsed page"""
+        with self._lock:
+            self.misses += 1
+            self._entries[company] = {
+                'source': source,
+                'signature': signature,
+                'fingerprint': fingerprint,
+                'etag': etag,
+                'last_modified': last_modified,
+                'jobs': jobs
+            }
+
+    def save(self):
+        """Atomically write the cache to disk"""
+        with self._lock:
+            with atomic_write(self.filename) as f:
+                json.dump(self._entries, f, ensure_ascii=False)
+
+    def report(self):
+        """One-line summary of this run's hits and misses"""
+        return f"Page cache: {self.hits} unchanged (reused), {self.misses} changed or new (parsed)"
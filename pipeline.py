@@ -0,0 +1,290 @@
+import multiprocessing
+import os
+import queue
+import threading
+import time
+from collections import namedtuple
+from concurrent.futures import Future, ProcessPoolExecutor, TimeoutError as FutureTimeout
+
+from changes import assign_ids
+from classify import RoleClassifier
+from extract import get_engine
+
+# A fetched company page whose HTML still has to be parsed
+Page = namedtuple('Page', ['company', 'url', 'source', 'html', 'fingerprint', 'etag', 'last_modified'])
+
+# Seconds the writer waits for one page's parse result before failing the company
+PARSE_TIMEOUT = 120
+
+
+def parse_jobs(html, company_name, url, engine, classifier, base_url, timings=None):
+    """Parse matching jobs out of a company page, or return None if it has no job elements
+
+    With a `timings` dict, the seconds spent extracting ('parse') and
+    classifying and filtering ('classify') are stored in it, along with the
+    number of job elements that failed to parse ('parse_errors').
+    """
+    start = time.perf_counter()
+    listings = engine.extract(html)
+    if timings is not None:
+        timings.update(parse=time.perf_counter() - start, classify=0.0, parse_errors=0)
+
+    if listings is None:
+        return None
+    return jobs_from_listings(listings, company_name, url, classifier, base_url, timings)
+
+
+def jobs_from_listings(listings, company_name, url, classifier, base_url, timings=None):
+    """Classify extracted listings and build the records of the jobs in the wanted role families"""
+    start = time.perf_counter()
+
+    # Classify every title on the page in one batch
+    listings = [listing for listing in listings if listing.title is not None]
+    categories = classifier.classify_many([listing.title for listing in listings])
+
+    jobs = []
+    errors = 0
+    for listing, roles in zip(listings, categories):
+        try:
+            # Filter for the wanted role families (SDE by default)
+            if classifier.wanted(roles):
+                job_data = {
+                    'company': company_name,
+                    'title': listing.title,
+                    'location': listing.location if listing.location is not None else 'Not specified',
+                    'url': listing.href if listing.has_link else url,
+                    'scraped_from': url,
+                    'roles': roles
+                }
+
+                # Make URL absolute if it's relative
+                if job_data['url'] and not job_data['url'].startswith('http'):
+                    job_data['url'] = f"{base_url}{job_data['url']}"
+
+                jobs.append(job_data)
+
+        except Exception as e:
+            print(f"  Error parsing job element: {e}")
+            errors += 1
+            continue
+
+    # Nested job elements can yield the same job twice
+    jobs = assign_ids(jobs)
+    for job in jobs:
+        print(f"  Found: {job['title']} [{', '.join(job['roles'])}]")
+
+    if timings is not None:
+        timings['classify'] = timings.get('classify', 0.0) + time.perf_counter() - start
+        timings['parse_errors'] = timings.get('parse_errors', 0) + errors
+    return jobs
+
+
+# Parser state of a parse-stage process, built once by _init_parser
+_parser = None
+
+
+def _init_parser(engine_name, taxonomy, include, base_url):
+    global _parser
+    _parser = (get_engine(engine_name), RoleClassifier(taxonomy, include), base_url)
+
+
+def _parse_page(html, company_name, url):
+    engine, classifier, base_url = _parser
+    timings = {}
+    return parse_jobs(html, company_name, url, engine, classifier, base_url, timings), timings
+
+
+class ScrapePipeline:
+    """Scrape companies in three overlapping stages
+
+    Fetch threads download company pages (over HTTP, or in their own Chrome
+    session) and queue the raw HTML. A dispatcher hands queued pages to a
+    pool of parser processes, which extract and classify jobs on every core
+    while the fetchers move on to the next page. The calling thread is the
+    writer stage: it collects parsed jobs, updates the page cache, sends
+    static pages without job elements back to be rendered in Chrome, and
+    yields each company's jobs in company order.
+
+    Both queues between the stages are bounded, so fetchers wait when the
+    parsers fall behind and the parsers wait when the writer does, instead
+    of pages piling up in memory.
+
+    Parser processes are started with forkserver (spawn where that is not
+    available) rather than forked from this multi-threaded process, where
+    a child could inherit a lock another thread held and hang on it.
+
+    Pages the parser pool cannot take (e.g. after a parser process died),
+    or that are not parsed within `parse_timeout` seconds, fail their
+    company. If a stage thread itself dies, the pipeline stops and the
+    companies not done yet are failed, rather than the other stages
+    waiting on it forever.
+    """
+
+    def __init__(self, scraper, fetch_workers=1, parse_workers=None, queue_size=8, parse_timeout=PARSE_TIMEOUT):
+        self.scraper = scraper
+        self.fetch_workers = max(1, fetch_workers)
+        self.parse_workers = parse_workers or os.cpu_count() or 1
+        self.queue_size = queue_size
+        self.parse_timeout = parse_timeout
+        self._stop = threading.Event()
+
+    def _put(self, q, item):
+        """Put on a bounded queue, giving up once the pipeline is stopping"""
+        while not self._stop.is_set():
+            try:
+                q.put(item, timeout=0.2)
+                return True
+            except queue.Full:
+                continue
+        return False
+
+    def _get(self, q):
+        """Get from a queue, returning None once the pipeline is stopping"""
+        while not self._stop.is_set():
+            try:
+                return q.get(timeout=0.2)
+            except queue.Empty:
+                continue
+        return None
+
+    def _result(self, future):
+        """Wait for a parse result, giving up after parse_timeout seconds or once the pipeline is stopping"""
+        deadline = time.monotonic() + self.parse_timeout
+        while not self._stop.is_set():
+            try:
+                return future.result(timeout=0.2)
+            except FutureTimeout:
+                if time.monotonic() > deadline:
+                    raise TimeoutError(f"no parse result after {self.parse_timeout}s")
+        raise RuntimeError("pipeline stopped")
+
+    def _run_stage(self, stage, *args):
+        """Run a stage thread, stopping the whole pipeline if it dies"""
+        try:
+            stage(*args)
+        except BaseException as e:
+            print(f"Pipeline stage {stage.__name__} failed: {e!r}")
+            raise
+        finally:
+            self._stop.set()
+
+    def _fetch_stage(self, work, pages, results):
+        scraper = self.scraper
+        while True:
+            item = self._get(work)
+            if item is None:
+                return
+            index, company, render = item
+            if not render:
+                print(f"\nScraping jobs for {company}...")
+            try:
+                with scraper.metrics.company(company):
+                    jobs, page = scraper.fetch_company_page(company, render=render)
+            except Exception as e:
+                print(f"Error scraping {company}: {e}")
+                scraper.failed_companies.add(company)
+                scraper.metrics.count('failed_companies')
+                jobs, page = [], None
+
+            if page is None:
+                self._put(results, (index, company, None, jobs))
+            else:
+                self._put(pages, (index, page))
+
+    def _dispatch_stage(self, executor, pages, results):
+        while True:
+            item = self._get(pages)
+            if item is None:
+                return
+            index, page = item
+            try:
+                future = executor.submit(_parse_page, page.html, page.company, page.url)
+            except Exception as e:
+                # The pool is broken or shut down; the writer fails the company
+                future = Future()
+                future.set_exception(e)
+            # Only the metadata travels on, the HTML is now the parser's
+            self._put(results, (index, page.company, page._replace(html=None), future))
+
+    def run(self, companies):
+        """Scrape `companies`, yielding each company's jobs in company order"""
+        if not companies:
+            return
+        scraper = self.scraper
+        work = queue.Queue()
+        pages = queue.Queue(self.queue_size)
+        results = queue.Queue(self.queue_size)
+        for index, company in enumerate(companies):
+            work.put((index, company, False))
+
+        start_method = 'forkserver' if 'forkserver' in multiprocessing.get_all_start_methods() else 'spawn'
+        executor = ProcessPoolExecutor(
+            max_workers=self.parse_workers,
+            mp_context=multiprocessing.get_context(start_method),
+            initializer=_init_parser,
+            initargs=(scraper.engine.name, scraper.classifier.taxonomy, sorted(scraper.classifier.include),
+                      scraper.base_url)
+        )
+        threads = [threading.Thread(target=self._run_stage, args=(self._fetch_stage, work, pages, results), daemon=True)
+                   for _ in range(min(self.fetch_workers, len(companies)))]
+        threads.append(threading.Thread(target=self._run_stage, args=(self._dispatch_stage, executor, pages, results),
+                                        daemon=True))
+        for thread in threads:
+            thread.start()
+        print(f"Scraping {len(companies)} companies with {len(threads) - 1} fetchers "
+              f"and {self.parse_workers} parser processes...")
+
+        ready = {}
+        next_index = 0
+        timed_out = False
+        try:
+            while next_index < len(companies):
+                item = self._get(results)
+                if item is None:
+                    # A stage died; fail the companies still outstanding
+                    for index in range(next_index, len(companies)):
+                        if index not in ready:
+                            scraper.failed_companies.add(companies[index])
+                            scraper.metrics.count('failed_companies')
+                            ready[index] = []
+                    while next_index in ready:
+                        yield ready.pop(next_index)
+                        next_index += 1
+                    break
+                index, company, page, outcome = item
+                if page is None:
+                    jobs = outcome
+                else:
+                    try:
+                        jobs, timings = self._result(outcome)
+                        scraper.record_parse_timings(timings, company)
+                        jobs = scraper.store_parsed_jobs(page, jobs)
+                    except Exception as e:
+                        timed_out = timed_out or isinstance(e, TimeoutError)
+                        print(f"Error scraping {company}: {e}")
+                        scraper.failed_companies.add(company)
+                        scraper.metrics.count('failed_companies')
+                        jobs = []
+                    if jobs is None:
+                        # No job elements in the static HTML, render the page in Chrome
+                        work.put((index, company, True))
+                        continue
+                if company not in scraper.failed_companies:
+                    print(f"Found {len(jobs)} SDE jobs at {company}")
+
+                ready[index] = jobs
+                while next_index in ready:
+                    yield ready.pop(next_index)
+                    next_index += 1
+
+        finally:
+            self._stop.set()
+            for thread in threads:
+                thread.join()
+            if timed_out:
+                # A hung parser would keep shutdown() waiting for it forever
+                for process in list((executor._processes or {}).values()):
+                    process.terminate()
+            executor.shutdown(cancel_futures=True)
+            # Each fetch thread started its own Chrome session on first use
+            scraper._quit_drivers(keep=scraper._driver)
@@ -0,0 +1,77 @@
+import threading
+import time
+from urllib.parse import urlsplit
+
+
+class TokenBucket:
+    """Token bucket refilled at `rate` tokens per second, holding at most `burst` tokens"""
+
+    def __init__(self, rate, burst=1):
+        self.rate = rate
+        self.burst = burst
+        self.tokens = burst
+        self.updated = time.monotonic()
+
+    def reserve(self, now):
+        """Take a token and return how long the caller must wait before using it
+
+        Tokens may go negative so that concurrent callers queue up behind each
+        other instead of all waking up at the same moment.
+        """
+        self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+        self.tokens -= 1
+        return -self.tokens / self.rate if self.tokens < 0 else 0.0
+
+
+class AdaptiveRateLimiter:
+    """Per-host token buckets whose rate adapts to how the host is responding
+
+    Throttled (429), failing (5xx) or slow responses halve the host's rate;
+    fast responses raise it step by step up to `max_rate`.
+    """
+
+    def __init__(self, rate=0.5, min_rate=0.05, max_rate=2.0, burst=1,
+                 increase=0.05, decrease=0.5, fast_threshold=1.5, slow_threshold=6.0):
+        self.rate = rate
+        self.min_rate = min_rate
+        self.max_rate = max_rate
+        self.burst = burst
+        self.increase = increase
+        self.decrease = decrease
+        self.fast_threshold = fast_threshold
+        self.slow_threshold = slow_threshold
+        self._buckets = {}
+        self._lock = threading.Lock()
+
+    def _bucket(self, url):
+        host = urlsplit(url).netloc
+        if host not in self._buckets:
+            self._buckets[host] = TokenBucket(self.rate, self.burst)
+        return self._buckets[host]
+
+    def acquire(self, url):
+        """Block until a request to `url`'s host is allowed"""
+        with self._lock:
+            wait = self._bucket(url).reserve(time.monotonic())
+        if wait > 0:
+            time.sleep(wait)
+
+    def record(self, url, status=None, elapsed=None):
+        """Adjust the host's rate from the outcome of a request
+
+        `status` is the HTTP status code (None for browser loads or network
+        errors reported as 599), `elapsed` the request duration in seconds.
+        """
+        with self._lock:
+            bucket = self._bucket(url)
+            throttled = status is not None and (status == 429 or status >= 500)
+            if throttled or (elapsed is not None and elapsed >= self.slow_threshold):
+                bucket.rate = max(self.min_rate, bucket.rate * self.decrease)
+            elif elapsed is not None and elapsed <= self.fast_threshold:
+                bucket.rate = min(self.max_rate, bucket.rate + self.increase)
+
+    def current_rate(self, url):
+        """Requests per second currently allowed for `url`'s host"""
+        with self._lock:
+            return self._bucket(url).rate
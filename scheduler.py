@@ -0,0 +1,149 @@
+import hashlib
+import json
+import math
+import os
+import time
+
+from changes import COMPARED_FIELDS, job_id
+from output import atomic_write
+
+HOUR = 3600
+
+# Weight of the latest scrape in the moving averages of change rate and cost
+SMOOTHING = 0.3
+# Lowest change rate a board is ranked with, so stable boards are still refreshed under a tight budget
+MIN_CHANGE_RATE = 0.05
+# Assumed cost of a company that was never scraped, until some were
+DEFAULT_COST = 5.0
+
+
+def jobs_signature(jobs):
+    """Hash of a company's jobs that changes when jobs are added, removed or edited"""
+    rows = sorted(
+        [job.get('id') or job_id(job)] + [json.dumps(job.get(field), ensure_ascii=False) for field in COMPARED_FIELDS]
+        for job in jobs
+    )
+    return hashlib.sha1(json.dumps(rows).encode('utf-8')).hexdigest()
+
+
+class RefreshScheduler:
+    """Decides which companies each run scrapes, from how often their boards changed and what they cost
+
+    Every company has a refresh interval. It starts at `min_interval` and
+    doubles after each scrape that finds the board unchanged, up to
+    `max_interval`, and drops back to `min_interval` as soon as the board
+    changes. Companies whose interval has not passed are skipped. With a
+    `budget` (seconds of scraping per run), the due companies are ranked
+    by expected change per second of scraping and taken until their
+    estimated cost fills the budget; the rest wait for the next run.
+    Change rates and costs are moving averages over past scrapes, kept in
+    a JSON file between runs.
+    """
+
+    def __init__(self, filename='a16z_schedule.json', min_interval=HOUR, max_interval=7 * 24 * HOUR, budget=None):
+        self.filename = filename
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.budget = budget
+        self.entries = {}
+        self.planned = {}
+
+        if os.path.exists(filename):
+            try:
+                with open(filename, 'r', encoding='utf-8') as f:
+                    self.entries = json.load(f)
+            except Exception as e:
+                print(f"Error loading schedule, starting empty: {e}")
+
+    def _is_due(self, company, now):
+        entry = self.entries.get(company)
+        return entry is None or now - entry['last_scraped'] >= entry['interval']
+
+    def estimated_cost(self, company):
+        """Expected seconds to scrape a company, from its past scrapes or the average of all companies"""
+        entry = self.entries.get(company)
+        if entry is not None:
+            return entry['cost']
+        if self.entries:
+            return sum(entry['cost'] for entry in self.entries.values()) / len(self.entries)
+        return DEFAULT_COST
+
+    def priority(self, company, now):
+        """Expected changes found per second of scraping; companies never scraped come first"""
+        entry = self.entries.get(company)
+        if entry is None:
+            return math.inf
+        overdue = (now - entry['last_scraped']) / entry['interval']
+        return max(entry['change_rate'], MIN_CHANGE_RATE) * overdue / max(entry['cost'], 0.1)
+
+    def plan(self, companies, can_skip, workers=1, now=None):
+        """Split companies into those to scrape this run and those to skip, both in company-list order
+
+        `can_skip(company)` says whether a company's previous jobs are
+        available to stand in for it; companies without them are always
+        scraped. The budget is spread over `workers` scraping in parallel.
+        """
+        now = now or time.time()
+        due = [company for company in companies if self._is_due(company, now) or not can_skip(company)]
+
+        chosen = set(due)
+        if self.budget is not None:
+            capacity = self.budget * max(1, workers)
+            spent = 0.0
+            chosen = set()
+            # Companies that have to be scraped anyway take their share of the budget first
+            ranked = sorted(due, key=lambda company: (not can_skip(company), self.priority(company, now)), reverse=True)
+            for company in ranked:
+                cost = self.estimated_cost(company)
+                if spent + cost > capacity and can_skip(company):
+                    continue
+                chosen.add(company)
+                spent += cost
+
+        scrape = [company for company in companies if company in chosen]
+        skip = [company for company in companies if company not in chosen]
+        self.planned = {
+            'scrape': len(scrape),
+            'not_due': sum(1 for company in skip if not self._is_due(company, now)),
+            'over_budget': sum(1 for company in skip if self._is_due(company, now)),
+            'estimated_seconds': round(sum(self.estimated_cost(company) for company in scrape), 1)
+        }
+        return scrape, skip
+
+    def record(self, company, jobs, seconds, now=None):
+        """Update a company's change rate, cost and interval after scraping it; returns whether its jobs changed"""
+        now = now or time.time()
+        signature = jobs_signature(jobs)
+        entry = self.entries.get(company)
+        if entry is None:
+            # First scrape: nothing to compare with, so the board is assumed to be moderately active
+            self.entries[company] = {
+                'last_scraped': now, 'interval': self.min_interval, 'change_rate': 0.5,
+                'cost': seconds, 'signature': signature
+            }
+            return False
+
+        changed = signature != entry['signature']
+        entry['change_rate'] = SMOOTHING * changed + (1 - SMOOTHING) * entry['change_rate']
+        entry['cost'] = SMOOTHING * seconds + (1 - SMOOTHING) * entry['cost']
+        # Exponential backoff while the board stays the same
+        if changed:
+            entry['interval'] = self.min_interval
+        else:
+            entry['interval'] = min(max(entry['interval'] * 2, self.min_interval), self.max_interval)
+        entry['last_scraped'] = now
+        entry['signature'] = signature
+        return changed
+
+    def save(self):
+        """Atomically write the schedule to disk"""
+        with atomic_write(self.filename) as f:
+            json.dump(self.entries, f, indent=2)
+
+    def report(self):
+        """One-line summary of this run's plan"""
+        planned = self.planned
+        if not planned:
+            return "Schedule: nothing planned"
+        return (f"Schedule: scraping {planned['scrape']} companies (about {planned['estimated_seconds']}s), "
+                f"skipping {planned['not_due']} not due and {planned['over_budget']} over budget")
@@ -1,51 +1,270 @@
 import requests
 from bs4 import BeautifulSoup
-import json
+import threading
 import time
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
 from selenium import webdriver
+from selenium.common.exceptions import TimeoutException, WebDriverException
 from selenium.webdriver.common.by import By
 from selenium.webdriver.support.ui import WebDriverWait
-from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.chrome.options import Options
 
+from api_capture import capture_endpoints, fetch_listings
+from browser import BrowserStats, block_resources, configure_lean_options, process_tree_rss
+from changes import job_id
+from classify import RoleClassifier
+from extract import get_engine
+from metrics import ScrapeMetrics
+from output import write_csv_atomic, write_json_atomic
+from page_cache import fingerprint_html
+from pipeline import Page, ScrapePipeline, jobs_from_listings, parse_jobs
+from ratelimit import AdaptiveRateLimiter
+from workqueue import LeaseKeeper, worker_name
+
+USER_AGENT = 'Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36'
+
+# Elements that mean a rendered page has the content we are after
+COMPANY_LINK_SELECTOR = "a[href*='/jobs/']"
+JOB_LISTING_SELECTOR = "div[class*='job' i], a[class*='job' i], li[class*='job' i]"
+
+
+class listings_or_stable_dom:
+    """Expected condition: elements matching `css_selector` are present, or the DOM stopped changing
+    
+    The DOM counts as stable once the document has finished loading and its
+    element count has not changed for `quiet_period` seconds.
+    """
+    def __init__(self, css_selector, quiet_period=1.0):
+        self.css_selector = css_selector
+        self.quiet_period = quiet_period
+        self.last_size = None
+        self.stable_since = None
+    
+    def __call__(self, driver):
+        if driver.find_elements(By.CSS_SELECTOR, self.css_selector):
+            return True
+        
+        size = driver.execute_script(
+            "return document.readyState === 'complete' ? document.getElementsByTagName('*').length : -1"
+        )
+        now = time.monotonic()
+        if size < 0 or size != self.last_size:
+            self.last_size = size
+            self.stable_since = now
+            return False
+        return now - self.stable_since >= self.quiet_period
+
+
+
 class A16zJobsScraper:
-    def __init__(self):
-        """Initialize the scraper with Chrome options for headless browsing"""
+    def __init__(self, use_http=True, rate_limiter=None, page_cache=None, engine=None, classifier=None,
+                 lean=False, recycle_after=0, base_url="https://jobs.a16z.com", api_spec=None,
+                 capture_network=False):
+        """Initialize the scraper with a pooled HTTP session and a lazily started headless Chrome
+        
+        With use_http, pages are first fetched as static HTML and Chrome is only
+        started for pages whose listings need JavaScript to render. Every page
+        load, by any worker, goes through the shared per-host rate limiter.
+        With a page_cache, company pages that have not changed since the last
+        run reuse that run's jobs instead of being parsed again. `engine` names
+        the HTML extraction engine (see extract.ENGINES), by default the
+        fastest one installed. `classifier` tags each job with its role
+        families and decides which ones are kept (SDE roles by default).
+        
+        With lean, Chrome loads pages eagerly and blocks images, fonts,
+        stylesheets and trackers (see browser.BLOCKED_URL_PATTERNS). Each
+        worker keeps one warm tab for all its pages, and with recycle_after
+        its Chrome is replaced after that many page loads to bound memory
+        growth. Page load times and Chrome memory use are kept per worker in
+        browser_stats. `base_url` is the job board to scrape, e.g. a local
+        stand-in from benchmarks/standin_site.py.
+        
+        With an api_spec (an api_capture.ApiSpec), companies are first
+        fetched from the job board's JSON endpoints found by discover_api(),
+        following their pagination, and only fall back to the HTML page if
+        that fails. capture_network turns on the Chrome performance log that
+        discovery reads.
+        """
+        self.base_url = base_url.rstrip('/')
+        self.all_jobs = []
+        self.failed_companies = set()
+        self.use_http = use_http
+        self.session = self._create_session()
+        self.rate_limiter = rate_limiter or AdaptiveRateLimiter()
+        self.page_cache = page_cache
+        self.engine = get_engine(engine)
+        self.classifier = classifier or RoleClassifier()
+        self.lean = lean
+        self.recycle_after = recycle_after
+        self.browser_stats = BrowserStats()
+        self.metrics = ScrapeMetrics()
+        self.api_spec = api_spec
+        self.capture_network = capture_network
+        
+        # Chrome sessions are per thread, so parallel workers never share a browser
+        self._local = threading.local()
+        self._drivers = []
+        self._drivers_lock = threading.Lock()
+    
+    @property
+    def driver(self):
+        """The calling thread's Chrome session, started on first use"""
+        driver = getattr(self._local, 'driver', None)
+        if driver is None:
+            driver = self._create_driver()
+            self._local.driver = driver
+            self._local.loads = 0
+            with self._drivers_lock:
+                self._drivers.append(driver)
+        return driver
+    
+    @property
+    def _driver(self):
+        """The calling thread's Chrome session if it has been started"""
+        return getattr(self._local, 'driver', None)
+    
+    def _restart_driver(self):
+        """Replace the calling thread's Chrome session, e.g. after it crashed"""
+        driver = self._local.__dict__.pop('driver', None)
+        if driver is not None:
+            with self._drivers_lock:
+                self._drivers.remove(driver)
+            try:
+                driver.quit()
+            except WebDriverException:
+                pass
+    
+    def _quit_drivers(self, keep=None):
+        """Quit every Chrome session except `keep`"""
+        with self._drivers_lock:
+            drivers, self._drivers = self._drivers, [keep] if keep is not None else []
+        for driver in drivers:
+            if driver is not keep:
+                driver.quit()
+    
+    def _create_driver(self):
+        """Create a headless Chrome session"""
         chrome_options = Options()
         chrome_options.add_argument('--headless')
         chrome_options.add_argument('--no-sandbox')
         chrome_options.add_argument('--disable-dev-shm-usage')
         chrome_options.add_argument('--disable-blink-features=AutomationControlled')
-        chrome_options.add_argument('user-agent=Mozilla/5.0 (Windows NT 10.0; Win64; x64) AppleWebKit/537.36')
+        chrome_options.add_argument(f'user-agent={USER_AGENT}')
+        if self.lean:
+            configure_lean_options(chrome_options)
+        if self.capture_network:
+            chrome_options.set_capability('goog:loggingPrefs', {'performance': 'ALL'})
         
-        self.driver = webdriver.Chrome(options=chrome_options)
-        self.base_url = "https://jobs.a16z.com"
-        self.all_jobs = []
+        driver = webdriver.Chrome(options=chrome_options)
+        if self.lean:
+            # The tab is reused for every page, so blocking once covers them all
+            block_resources(driver)
+        return driver
+    
+    def _create_session(self, pool_size=16):
+        """Create a keep-alive HTTP session that retries connection failures
+        
+        HTTP error statuses are not retried here: they are surfaced to the rate
+        limiter, which slows down before _fetch_static tries again.
+        """
+        session = requests.Session()
+        retry = Retry(total=3, backoff_factor=0.5, allowed_methods=('GET', 'HEAD'), respect_retry_after_header=False)
+        adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+        session.mount('https://', adapter)
+        session.mount('http://', adapter)
+        session.headers['User-Agent'] = USER_AGENT
+        return session
+    
+    def _fetch_static(self, url, headers=None, attempts=3):
+        """Fetch a page's server-rendered HTML, returning the response or None if the request fails"""
+        for attempt in range(attempts):
+            self.rate_limiter.acquire(url)
+            start = time.monotonic()
+            try:
+                with self.metrics.phase('navigation'):
+                    response = self.session.get(url, headers=headers, timeout=15)
+            except requests.RequestException as e:
+                self.rate_limiter.record(url, status=599, elapsed=time.monotonic() - start)
+                self.metrics.count('http_errors')
+                print(f"  HTTP fetch failed for {url}: {e}")
+                return None
+            
+            self.rate_limiter.record(url, status=response.status_code, elapsed=time.monotonic() - start)
+            if response.status_code == 429 or response.status_code >= 500:
+                print(f"  HTTP {response.status_code} for {url}, backing off (attempt {attempt + 1}/{attempts})")
+                self.metrics.count('retries')
+                continue
+            if not response.ok:
+                print(f"  HTTP fetch failed for {url}: {response.status_code}")
+                self.metrics.count('http_errors')
+                return None
+            return response
+        
+        return None
+    
+    def _fetch_rendered(self, url, wait_for=JOB_LISTING_SELECTOR, timeout=10):
+        """Load a page in Chrome and return the rendered HTML
+        
+        Returns as soon as elements matching `wait_for` appear or the DOM stops
+        changing, instead of sleeping for a fixed time. If this thread's Chrome
+        session has died, it is restarted and the page loaded again. Once the
+        thread's session has served recycle_after loads, it is replaced first.
+        """
+        if self._driver is not None and self.recycle_after and self._local.loads >= self.recycle_after:
+            # Chrome's memory grows with every page, start this one in a fresh session
+            self._restart_driver()
+            self.browser_stats.record_recycle()
+        
+        self.rate_limiter.acquire(url)
+        start = navigation_start = time.monotonic()
+        with self.metrics.phase('navigation'):
+            try:
+                self.driver.get(url)
+            except WebDriverException as e:
+                print(f"  Chrome session failed ({e.msg}), restarting it")
+                self.metrics.count('driver_restarts')
+                self._restart_driver()
+                navigation_start = time.monotonic()
+                self.driver.get(url)
+            # Only the host's response time paces the host, not how long the page takes to settle
+            self.rate_limiter.record(url, elapsed=time.monotonic() - navigation_start)
+        driver = self.driver
+        self.metrics.count('rendered_pages')
+        
+        with self.metrics.phase('wait'):
+            try:
+                WebDriverWait(driver, timeout, poll_frequency=0.25).until(listings_or_stable_dom(wait_for))
+            except TimeoutException:
+                print(f"  Timed out waiting for {url} to settle, using the page as is")
+                self.metrics.count('wait_timeouts')
+        
+        elapsed = time.monotonic() - start
+        self._local.loads += 1
+        self.browser_stats.record_load(elapsed, process_tree_rss(driver.service.process.pid))
+        return driver.page_source
         
     def get_companies(self):
         """Get all companies from the main companies page"""
         print("Fetching companies list...")
-        self.driver.get(f"{self.base_url}/companies")
-        
-        # Wait for the page to load
-        time.sleep(3)
+        url = f"{self.base_url}/companies"
         
         try:
-            # Wait for company elements to load
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            # Get company links - adjust selectors based on actual page structure
-            company_elements = self.driver.find_elements(By.CSS_SELECTOR, "a[href*='/jobs/']")
             companies = []
+            response = self._fetch_static(url) if self.use_http else None
+            if response is not None:
+                soup = BeautifulSoup(response.text, 'html.parser')
+                hrefs = [a.get('href') for a in soup.select(COMPANY_LINK_SELECTOR)]
+                companies = self._company_names(hrefs)
             
-            for element in company_elements:
-                href = element.get_attribute('href')
-                if href and '/jobs/' in href:
-                    company_name = href.split('/jobs/')[-1]
-                    if company_name and company_name not in companies:
-                        companies.append(company_name)
+            if not companies:
+                # Listings are rendered client-side, fall back to the browser
+                self._fetch_rendered(url, wait_for=COMPANY_LINK_SELECTOR)
+                
+                # Get company links - adjust selectors based on actual page structure
+                company_elements = self.driver.find_elements(By.CSS_SELECTOR, COMPANY_LINK_SELECTOR)
+                companies = self._company_names(element.get_attribute('href') for element in company_elements)
             
             print(f"Found {len(companies)} companies")
             return companies
@@ -54,146 +273,487 @@ class A16zJobsScraper:
             print(f"Error getting companies: {e}")
             return []
     
+    def _company_names(self, hrefs):
+        """Extract unique company names from job board links, in page order"""
+        companies = []
+        seen = set()
+        for href in hrefs:
+            if href and '/jobs/' in href:
+                company_name = href.split('/jobs/')[-1]
+                if company_name and company_name not in seen:
+                    seen.add(company_name)
+                    companies.append(company_name)
+        return companies
+    
     def scrape_company_jobs(self, company_name):
         """Scrape all jobs for a specific company"""
         print(f"\nScraping jobs for {company_name}...")
-        url = f"{self.base_url}/jobs/{company_name}"
         
         try:
-            self.driver.get(url)
-            time.sleep(3)
-            
-            # Wait for job listings to load
-            WebDriverWait(self.driver, 10).until(
-                EC.presence_of_element_located((By.TAG_NAME, "body"))
-            )
-            
-            # Parse the page source with BeautifulSoup
-            soup = BeautifulSoup(self.driver.page_source, 'html.parser')
-            
-            # Try multiple possible selectors for job listings
-            job_elements = (
-                soup.find_all('div', class_=lambda x: x and 'job' in x.lower()) or
-                soup.find_all('a', class_=lambda x: x and 'job' in x.lower()) or
-                soup.find_all('li', class_=lambda x: x and 'job' in x.lower())
-            )
-            
-            jobs = []
-            for job_element in job_elements:
-                try:
-                    # Extract job information - adjust based on actual HTML structure
-                    job_title = job_element.find(['h2', 'h3', 'h4', 'a'])
-                    job_location = job_element.find(class_=lambda x: x and ('location' in str(x).lower() or 'city' in str(x).lower()))
-                    job_link = job_element.find('a')
-                    
-                    # Filter for SDE/Software Engineering roles
-                    if job_title:
-                        title_text = job_title.get_text(strip=True)
-                        
-                        # Keywords for software engineering roles
-                        sde_keywords = [
-                            'software', 'engineer', 'developer', 'sde', 'backend', 
-                            'frontend', 'full stack', 'fullstack', 'full-stack'
-                        ]
-                        
-                        if any(keyword in title_text.lower() for keyword in sde_keywords):
-                            job_data = {
-                                'company': company_name,
-                                'title': title_text,
-                                'location': job_location.get_text(strip=True) if job_location else 'Not specified',
-                                'url': job_link.get('href') if job_link else url,
-                                'scraped_from': url
-                            }
-                            
-                            # Make URL absolute if it's relative
-                            if job_data['url'] and not job_data['url'].startswith('http'):
-                                job_data['url'] = f"{self.base_url}{job_data['url']}"
-                            
-                            jobs.append(job_data)
-                            print(f"  Found: {title_text}")
+            with self.metrics.company(company_name):
+                jobs, page = self.fetch_company_page(company_name)
+                if page is not None:
+                    jobs = self.store_parsed_jobs(page, self._parse_jobs(page.html, company_name, page.url))
                 
-                except Exception as e:
-                    print(f"  Error parsing job element: {e}")
-                    continue
+                if jobs is None:
+                    # No job elements in the static HTML, render the page in Chrome
+                    jobs, page = self.fetch_company_page(company_name, render=True)
+                    if page is not None:
+                        jobs = self.store_parsed_jobs(page, self._parse_jobs(page.html, company_name, page.url))
             
             print(f"Found {len(jobs)} SDE jobs at {company_name}")
             return jobs
             
         except Exception as e:
             print(f"Error scraping {company_name}: {e}")
+            self.failed_companies.add(company_name)
+            self.metrics.count('failed_companies')
             return []
     
-    def scrape_all_jobs(self):
-        """Scrape all SDE jobs from all companies"""
+    def fetch_company_page(self, company_name, render=False):
+        """Fetch a company page, returning (jobs, None) if the page cache has its jobs, otherwise (None, page)
+        
+        The page (a pipeline.Page) carries the HTML still to be parsed. Pages are
+        fetched over HTTP first unless `render` is set or HTTP is disabled, and
+        rendered in Chrome if the HTTP fetch fails.
+        """
+        url = f"{self.base_url}/jobs/{company_name}"
+        
+        if self.api_spec and not render:
+            jobs = self._fetch_api(company_name, url)
+            if jobs is not None:
+                return jobs, None
+        
+        if self.use_http and not render:
+            headers = None
+            if self.page_cache is not None:
+                headers = self.page_cache.conditional_headers(company_name, self.classifier.signature)
+            response = self._fetch_static(url, headers=headers)
+            
+            if response is not None and response.status_code == 304:
+                jobs = self._cached_jobs(company_name, 'http', not_modified=True)
+                if jobs is not None:
+                    return jobs, None
+                # The cache lost track of this page, fetch it unconditionally
+                response = self._fetch_static(url)
+            
+            if response is not None:
+                fingerprint = fingerprint_html(response.text)
+                jobs = self._cached_jobs(company_name, 'http', fingerprint)
+                if jobs is not None:
+                    return jobs, None
+                return None, Page(company_name, url, 'http', response.text, fingerprint,
+                                  response.headers.get('ETag'), response.headers.get('Last-Modified'))
+        
+        html = self._fetch_rendered(url)
+        fingerprint = fingerprint_html(html)
+        jobs = self._cached_jobs(company_name, 'browser', fingerprint)
+        if jobs is not None:
+            return jobs, None
+        return None, Page(company_name, url, 'browser', html, fingerprint, None, None)
+    
+    def _fetch_api(self, company_name, url):
+        """Jobs of a company from the discovered JSON endpoints, or None if none of them answers"""
+        for spec in self.api_spec.endpoints:
+            listings = fetch_listings(self._fetch_static, spec, company_name)
+            if listings is None:
+                continue
+            
+            timings = {}
+            jobs = jobs_from_listings(listings, company_name, url, self.classifier, self.base_url, timings)
+            self.metrics.record('classify', timings['classify'], company_name)
+            self.metrics.count('api_companies')
+            if self.page_cache is not None:
+                # Lets the scheduler reuse these jobs on runs that skip the company
+                self.page_cache.store(company_name, 'api', None, jobs, signature=self.classifier.signature)
+            print(f"  Fetched {len(listings)} listings from the JSON API")
+            return jobs
+        return None
+    
+    def discover_api(self, companies):
+        """Render `companies` in Chrome and record the JSON endpoints their pages load jobs from
+        
+        Needs capture_network. Endpoints whose URL contains the company slug
+        are saved to the api_spec as templates for every company. Returns the
+        number of new endpoints.
+        """
+        found = 0
+        for company_name in companies:
+            print(f"\nDiscovering the JSON API of {company_name}...")
+            self.driver.get_log('performance')  # Drop what earlier pages logged
+            self._fetch_rendered(f"{self.base_url}/jobs/{company_name}")
+            for spec in capture_endpoints(self.driver, company_name):
+                if self.api_spec.add(spec):
+                    found += 1
+                    print(f"  Found endpoint {spec['template']} (jobs at {spec['records_path']}, fields {spec['fields']})")
+        
+        if found:
+            self.api_spec.save()
+        print(f"Discovered {found} new JSON endpoints, {len(self.api_spec.endpoints)} known")
+        return found
+    
+    def store_parsed_jobs(self, page, jobs):
+        """Record the jobs parsed from a page in the page cache
+        
+        Returns the jobs, or None for a static page without job elements,
+        which has to be rendered instead.
+        """
+        if jobs is None and page.source == 'browser':
+            jobs = []
+        if jobs is not None and self.page_cache is not None:
+            self.page_cache.store(
+                page.company, page.source, page.fingerprint, jobs,
+                etag=page.etag,
+                last_modified=page.last_modified,
+                signature=self.classifier.signature
+            )
+        return jobs
+    
+    def _cached_jobs(self, company_name, source, fingerprint=None, not_modified=False):
+        """Jobs from the previous run if the page is unchanged, otherwise None"""
+        if self.page_cache is None:
+            return None
+        jobs = self.page_cache.lookup(company_name, source, self.classifier.signature, fingerprint, not_modified)
+        if jobs is not None:
+            for job in jobs:
+                job.setdefault('id', job_id(job))
+            self.metrics.count('cache_hits')
+            print(f"  Unchanged since last run, reusing {len(jobs)} jobs")
+        return jobs
+    
+    def _parse_jobs(self, html, company_name, url):
+        """Parse matching jobs out of a company page, or return None if it has no job elements"""
+        timings = {}
+        jobs = parse_jobs(html, company_name, url, self.engine, self.classifier, self.base_url, timings)
+        self.record_parse_timings(timings, company_name)
+        return jobs
+    
+    def record_parse_timings(self, timings, company_name):
+        """Add the timings filled in by pipeline.parse_jobs to the run metrics"""
+        self.metrics.record('parse', timings['parse'], company_name)
+        self.metrics.record('classify', timings['classify'], company_name)
+        if timings['parse_errors']:
+            self.metrics.count('parse_errors', timings['parse_errors'])
+    
+    def scrape_all_jobs(self, workers=1, writer=None, parse_workers=0, queue_size=8, scheduler=None):
+        """Scrape all SDE jobs from all companies
+        
+        With workers > 1, companies are spread across a pool of Chrome sessions.
+        All workers share the per-host rate limiter, so the load on the site is
+        bounded by its rate rather than by the number of workers. With
+        parse_workers > 0, pages are parsed in a pool of that many processes
+        while the workers fetch the next ones (see pipeline.ScrapePipeline),
+        with at most `queue_size` pages waiting between stages. Jobs are
+        merged in company order either way.
+        
+        With a writer (an output.JobStreamWriter or a storage.JobStore), each
+        company's jobs are written as soon as they are scraped instead of being
+        kept in self.all_jobs, companies the writer already has from an
+        interrupted run are skipped, and failed companies are left unchecked so
+        a resumed run retries them.
+        
+        With a scheduler (a scheduler.RefreshScheduler), only the companies it
+        picks are scraped; the others keep the jobs the page cache recorded
+        for them last time. Each scraped company's jobs and time update its
+        refresh interval.
+        """
         companies = self.get_companies()
         
         if not companies:
             print("No companies found. The page structure might have changed.")
             return []
         
+        if writer is not None:
+            companies = [company for company in companies if not writer.is_done(company)]
+        
+        scraped = companies
+        reused = {}
+        if scheduler is not None:
+            signature = self.classifier.signature
+            previous = {}
+            if self.page_cache is not None:
+                previous = {company: self.page_cache.previous_jobs(company, signature) for company in companies}
+            scraped, skipped = scheduler.plan(companies, lambda company: previous.get(company) is not None,
+                                              workers=workers)
+            reused = {company: previous[company] for company in skipped}
+            print(scheduler.report())
+        
+        if parse_workers > 0:
+            results = ScrapePipeline(self, workers, parse_workers, queue_size).run(scraped)
+        elif workers <= 1:
+            results = (self.scrape_company_jobs(company) for company in scraped)
+        else:
+            results = self._scrape_parallel(scraped, workers)
+        
         for company in companies:
-            jobs = self.scrape_company_jobs(company)
-            self.all_jobs.extend(jobs)
-            time.sleep(2)  # Be respectful with rate limiting
+            if company in reused:
+                # Not due for a refresh, carried over from the last run
+                jobs = reused[company]
+                for job in jobs:
+                    job.setdefault('id', job_id(job))
+                self.metrics.count('scheduled_skips')
+            else:
+                jobs = next(results)
+                if scheduler is not None and company not in self.failed_companies:
+                    scheduler.record(company, jobs, self.metrics.company_seconds(company))
+            if company not in self.failed_companies:
+                self.metrics.record_jobs(company, len(jobs))
+            if writer is None:
+                self.all_jobs.extend(jobs)
+            elif company not in self.failed_companies:
+                with self.metrics.company(company), self.metrics.phase('save'):
+                    writer.write_company(company, jobs)
+        
+        if self.page_cache is not None:
+            self.page_cache.save()
+            print(f"\n{self.page_cache.report()}")
+        if scheduler is not None:
+            scheduler.save()
+        if self.browser_stats.loads:
+            print(f"\n{self.browser_stats.report()}")
+        print(f"\n{self.metrics.report()}")
         
         return self.all_jobs
     
+    def _scrape_parallel(self, companies, workers):
+        """Scrape companies on a bounded pool of worker threads, yielding results in company order"""
+        if not companies:
+            return
+        workers = min(workers, len(companies))
+        
+        try:
+            print(f"Scraping {len(companies)} companies with {workers} workers...")
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                # map() yields in submission order, keeping the merged output stable
+                yield from executor.map(self.scrape_company_jobs, companies)
+        
+        finally:
+            # Each worker thread started its own Chrome session on first use
+            self._quit_drivers(keep=self._driver)
+    
+    def scrape_queue(self, queue, workers=1):
+        """Scrape companies leased from a shared workqueue.WorkQueue until its crawl is finished
+        
+        Each of the `workers` threads leases one company at a time and
+        stores its jobs in the queue; the leases are heartbeated in the
+        background while they are scraped. Failed companies are handed back
+        to the queue for another attempt, possibly by another worker. While
+        other workers still hold leases, idle threads wait, in case those
+        workers die and their leases expire. Returns the number of companies
+        this process completed.
+        """
+        worker = worker_name()
+        keeper = LeaseKeeper(queue, worker).start()
+        idle_wait = min(5.0, queue.lease_seconds / 4)
+        
+        def work():
+            completed = 0
+            while True:
+                company = queue.lease(worker)
+                if company is None:
+                    if queue.progress()['leased']:
+                        time.sleep(idle_wait)
+                        continue
+                    return completed
+                
+                keeper.add(company)
+                try:
+                    self.failed_companies.discard(company)
+                    jobs = self.scrape_company_jobs(company)
+                    if company in self.failed_companies:
+                        queue.fail(worker, company, "scrape failed")
+                    elif queue.complete(worker, company, jobs):
+                        self.metrics.record_jobs(company, len(jobs))
+                        completed += 1
+                    else:
+                        print(f"  Lease on {company} expired before it was stored, another worker has it")
+                finally:
+                    keeper.remove(company)
+        
+        print(f"Worker {worker} scraping from {queue.filename} with {workers} threads...")
+        try:
+            if workers <= 1:
+                completed = work()
+            else:
+                with ThreadPoolExecutor(max_workers=workers) as executor:
+                    futures = [executor.submit(work) for _ in range(workers)]
+                    completed = sum(future.result() for future in futures)
+        finally:
+            keeper.stop()
+            self._quit_drivers(keep=self._driver)
+        
+        if self.page_cache is not None:
+            self.page_cache.save()
+        print(f"\n{self.metrics.report()}")
+        return completed
+    
     def save_to_json(self, filename='a16z_sde_jobs.json'):
         """Save scraped jobs to JSON file"""
-        with open(filename, 'w', encoding='utf-8') as f:
-            json.dump(self.all_jobs, f, indent=2, ensure_ascii=False)
+        write_json_atomic(filename, self.all_jobs)
         print(f"\nSaved {len(self.all_jobs)} jobs to {filename}")
     
     def save_to_csv(self, filename='a16z_sde_jobs.csv'):
         """Save scraped jobs to CSV file"""
-        import csv
-        
         if not self.all_jobs:
             print("No jobs to save")
             return
         
-        keys = self.all_jobs[0].keys()
-        with open(filename, 'w', newline='', encoding='utf-8') as f:
-            writer = csv.DictWriter(f, fieldnames=keys)
-            writer.writeheader()
-            writer.writerows(self.all_jobs)
+        write_csv_atomic(filename, self.all_jobs)
         print(f"Saved {len(self.all_jobs)} jobs to {filename}")
     
     def close(self):
-        """Close the browser"""
-        self.driver.quit()
+        """Close the browsers and HTTP session"""
+        self._quit_drivers()
+        self.session.close()
 
 
 # Usage
 if __name__ == "__main__":
-    scraper = A16zJobsScraper()
+    import argparse
+    import itertools
+    import os
+    from output import JobStreamWriter
+    from page_cache import PageCache
+    from storage import JobStore
+    from api_capture import ApiSpec
+    from history import SnapshotStore
+    from scheduler import HOUR, RefreshScheduler
+    from workqueue import WorkQueue
+    
+    parser = argparse.ArgumentParser(description="Scrape SDE jobs from A16z portfolio companies")
+    parser.add_argument('--base-url', default="https://jobs.a16z.com", help="job board to scrape")
+    parser.add_argument('--workers', type=int, default=1, help="number of parallel Chrome sessions")
+    parser.add_argument('--parse-workers', type=int, default=0,
+                        help="processes parsing pages while the workers fetch the next ones (0: parse in the fetching thread)")
+    parser.add_argument('--queue-size', type=int, default=8, help="pages waiting between pipeline stages with --parse-workers")
+    parser.add_argument('--delay', type=float, default=2, help="initial seconds between page loads to the same host (0: start at --max-rate)")
+    parser.add_argument('--max-rate', type=float, default=2.0, help="maximum page loads per second to the same host")
+    parser.add_argument('--no-http', action='store_true', help="always render pages in Chrome instead of trying plain HTTP first")
+    parser.add_argument('--page-cache', default='a16z_page_cache.json', help="file remembering unchanged company pages between runs")
+    parser.add_argument('--engine', choices=('lxml', 'html.parser'), help="HTML extraction engine (default: lxml if installed)")
+    parser.add_argument('--roles', help="JSON file mapping role categories to title keywords (default: built-in taxonomy)")
+    parser.add_argument('--include', default='sde', help="comma-separated role categories to keep")
+    parser.add_argument('--lean', action='store_true', help="block images, fonts, stylesheets and trackers in Chrome and load pages eagerly")
+    parser.add_argument('--recycle-after', type=int,
+                        help="restart each Chrome session after this many page loads (default: 100 with --lean, otherwise never)")
+    parser.add_argument('--full', action='store_true', help="re-parse every company page, even if it has not changed")
+    parser.add_argument('--restart', action='store_true', help="ignore the checkpoint of an interrupted run and start over")
+    parser.add_argument('--db', default='a16z_jobs.db', help="SQLite database the jobs are stored in and exported from")
+    parser.add_argument('--no-db', action='store_true', help="stream jobs to a16z_sde_jobs.jsonl instead of the database")
+    parser.add_argument('--api-spec', default='a16z_api_endpoints.json', help="JSON endpoints found by --discover-api, used when present")
+    parser.add_argument('--discover-api', type=int, default=0, metavar='N',
+                        help="first render N companies in Chrome and record the JSON endpoints they load jobs from")
+    parser.add_argument('--no-api', action='store_true', help="ignore discovered JSON endpoints and scrape HTML pages")
+    parser.add_argument('--schedule', action='store_true',
+                        help="only scrape companies due for a refresh, reusing the last jobs of the others")
+    parser.add_argument('--schedule-file', default='a16z_schedule.json', help="per-company change rates, costs and refresh intervals")
+    parser.add_argument('--budget', type=float,
+                        help="seconds of scraping per worker this run may spend, most valuable companies first (implies --schedule)")
+    parser.add_argument('--min-interval', type=float, default=1, help="hours between refreshes of a board that keeps changing")
+    parser.add_argument('--max-interval', type=float, default=168, help="longest hours between refreshes of a stable board")
+    parser.add_argument('--history', default='a16z_history', help="directory of the columnar snapshot of every run, for trends")
+    parser.add_argument('--no-history', action='store_true', help="do not add this run to the history")
+    parser.add_argument('--mode', choices=('run', 'coordinator', 'worker', 'merge'), default='run',
+                        help="run: scrape everything in this process; coordinator: queue the company list; "
+                             "worker: scrape companies from the queue; merge: build the outputs from the queue")
+    parser.add_argument('--queue', default='a16z_queue.db', help="SQLite work queue shared by coordinator, workers and merge")
+    parser.add_argument('--lease-seconds', type=float, default=120, help="how long a worker may go without a heartbeat before its company is re-leased")
+    args = parser.parse_args()
+    if args.delay < 0 or args.max_rate <= 0:
+        parser.error("--delay must not be negative and --max-rate must be positive")
+    
+    rate_limiter = AdaptiveRateLimiter(rate=1 / args.delay if args.delay else args.max_rate, max_rate=args.max_rate)
+    page_cache = PageCache(args.page_cache, reuse=not args.full)
+    include = [category.strip() for category in args.include.split(',') if category.strip()]
+    classifier = RoleClassifier.from_file(args.roles, include) if args.roles else RoleClassifier(include=include)
+    api_spec = None if args.no_api else ApiSpec(args.api_spec)
+    scraper = A16zJobsScraper(use_http=not args.no_http, rate_limiter=rate_limiter, page_cache=page_cache,
+                              engine=args.engine, classifier=classifier, lean=args.lean, base_url=args.base_url,
+                              recycle_after=args.recycle_after if args.recycle_after is not None else (100 if args.lean else 0),
+                              api_spec=api_spec, capture_network=args.discover_api > 0)
+    
+    if args.discover_api and api_spec is not None:
+        scraper.discover_api(scraper.get_companies()[:args.discover_api])
+    
+    if args.mode in ('coordinator', 'worker'):
+        queue = WorkQueue(args.queue, lease_seconds=args.lease_seconds)
+        try:
+            if args.mode == 'coordinator':
+                companies = scraper.get_companies()
+                crawl_id = queue.enqueue(companies)
+                print(f"Queued crawl {crawl_id} of {len(companies)} companies in {args.queue}")
+                print("Start workers with --mode worker, then build the outputs with --mode merge")
+            else:
+                completed = scraper.scrape_queue(queue, workers=args.workers)
+                print(f"\nCompleted {completed} companies; crawl progress: {queue.progress()}")
+        finally:
+            queue.close()
+            scraper.close()
+        raise SystemExit(0)
+    
+    # Jobs are written as they are scraped; an interrupted run resumes where it stopped
+    if args.no_db:
+        writer = JobStreamWriter(resume=not args.restart)
+    else:
+        writer = JobStore(args.db).begin_run(resume=not args.restart)
     
     try:
-        # Scrape all jobs
-        jobs = scraper.scrape_all_jobs()
+        if args.mode == 'merge':
+            # Collect what the workers stored; unfinished companies count as failed
+            queue = WorkQueue(args.queue)
+            progress = queue.progress()
+            if progress['pending'] or progress['leased']:
+                print(f"Warning: crawl is not finished ({progress}), merging the completed companies")
+            scraper.failed_companies.update(queue.unfinished())
+            for company, jobs in queue.results():
+                if not writer.is_done(company):
+                    writer.write_company(company, jobs)
+                    scraper.metrics.record_jobs(company, len(jobs))
+        else:
+            # Scrape all jobs
+            scheduler = None
+            if args.schedule or args.budget is not None:
+                scheduler = RefreshScheduler(args.schedule_file, min_interval=args.min_interval * HOUR,
+                                             max_interval=args.max_interval * HOUR, budget=args.budget)
+            scraper.scrape_all_jobs(workers=args.workers, writer=writer, parse_workers=args.parse_workers,
+                                    queue_size=args.queue_size, scheduler=scheduler)
         
         # Display summary
         print(f"\n{'='*60}")
-        print(f"SUMMARY: Found {len(jobs)} total SDE jobs")
+        print(f"SUMMARY: Found {writer.total_jobs} total jobs ({args.include})")
+        print(page_cache.report())
+        if scraper.failed_companies:
+            print(f"Failed companies: {', '.join(sorted(scraper.failed_companies))}")
         print(f"{'='*60}")
         
         # Group by company
-        from collections import defaultdict
-        jobs_by_company = defaultdict(int)
-        for job in jobs:
-            jobs_by_company[job['company']] += 1
+        jobs_by_company = {company: count for company, count in writer.company_counts.items() if count}
         
         print("\nJobs by company:")
         for company, count in sorted(jobs_by_company.items(), key=lambda x: x[1], reverse=True):
             print(f"  {company}: {count} jobs")
         
         # Save results
-        scraper.save_to_json()
-        scraper.save_to_csv()
+        if args.no_db:
+            writer.finalize()
+        else:
+            # Keep the previous jobs of companies that failed this time
+            writer.finalize(keep_companies=scraper.failed_companies)
+        if args.mode == 'merge':
+            queue.mark_merged()
+        if not args.no_history:
+            run_id = SnapshotStore(args.history).append(writer.iter_jobs())
+            print(f"Added run {run_id} to the history in {args.history}")
+        
+        # Timings and counters of this run, next to the outputs
+        summary_filename = f"{os.path.splitext(writer.json_filename)[0]}.run.json"
+        scraper.metrics.write_summary(summary_filename, jobs=writer.total_jobs,
+                                      failed_companies=sorted(scraper.failed_companies))
+        print(f"Saved run summary to {summary_filename}")
         
         # Print first few jobs as example
         print("\nExample jobs:")
-        for job in jobs[:5]:
+        for job in itertools.islice(writer.iter_jobs(), 5):
             print(f"\n  Company: {job['company']}")
             print(f"  Title: {job['title']}")
             print(f"  Location: {job['location']}")
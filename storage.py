@@ -0,0 +1,397 @@
+import json
+import sqlite3
+import threading
+import time
+
+from changes import MAX_LOG_ENTRIES, job_id
+from jobs_index import tokenize
+from output import write_csv_atomic, write_json_atomic
+
+SCHEMA = '''
+CREATE TABLE IF NOT EXISTS runs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    started_at REAL NOT NULL,
+    finished_at REAL
+);
+
+-- Companies whose jobs are stored for a run; doubles as the resume checkpoint
+CREATE TABLE IF NOT EXISTS run_companies (
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    company TEXT NOT NULL,
+    jobs INTEGER NOT NULL,
+    PRIMARY KEY (run_id, company)
+);
+
+-- Jobs written by the unfinished run, merged into jobs when it finishes;
+-- seq keeps the order they were written in
+CREATE TABLE IF NOT EXISTS staged_jobs (
+    seq INTEGER PRIMARY KEY,
+    run_id INTEGER NOT NULL REFERENCES runs(id),
+    id TEXT NOT NULL,
+    company TEXT NOT NULL,
+    title TEXT NOT NULL,
+    location TEXT,
+    url TEXT,
+    scraped_from TEXT,
+    roles TEXT NOT NULL DEFAULT '[]'
+);
+
+CREATE INDEX IF NOT EXISTS staged_jobs_company ON staged_jobs(run_id, company);
+
+-- What each finished run added, removed and updated, as JSON job lists
+CREATE TABLE IF NOT EXISTS changes (
+    run_id INTEGER PRIMARY KEY REFERENCES runs(id),
+    created_at REAL NOT NULL,
+    added TEXT NOT NULL,
+    removed TEXT NOT NULL,
+    updated TEXT NOT NULL
+);
+
+-- id is set by changes.assign_ids(): stable across runs
+CREATE TABLE IF NOT EXISTS jobs (
+    id TEXT PRIMARY KEY,
+    company TEXT NOT NULL,
+    title TEXT NOT NULL,
+    location TEXT,
+    url TEXT,
+    scraped_from TEXT,
+    roles TEXT NOT NULL DEFAULT '[]',
+    position INTEGER NOT NULL,
+    first_seen_run INTEGER NOT NULL,
+    last_seen_run INTEGER NOT NULL,
+    added_run INTEGER NOT NULL DEFAULT 0,
+    updated_run INTEGER NOT NULL DEFAULT 0,
+    active INTEGER NOT NULL DEFAULT 1
+);
+
+CREATE INDEX IF NOT EXISTS jobs_active_position ON jobs(active, position);
+CREATE INDEX IF NOT EXISTS jobs_company ON jobs(company, active);
+CREATE INDEX IF NOT EXISTS jobs_location ON jobs(location, active);
+'''
+
+FTS_SCHEMA = '''
+CREATE VIRTUAL TABLE IF NOT EXISTS jobs_fts USING fts5(title, company, content='jobs', content_rowid='rowid');
+
+CREATE TRIGGER IF NOT EXISTS jobs_fts_insert AFTER INSERT ON jobs BEGIN
+    INSERT INTO jobs_fts(rowid, title, company) VALUES (new.rowid, new.title, new.company);
+END;
+CREATE TRIGGER IF NOT EXISTS jobs_fts_delete AFTER DELETE ON jobs BEGIN
+    INSERT INTO jobs_fts(jobs_fts, rowid, title, company) VALUES ('delete', old.rowid, old.title, old.company);
+END;
+CREATE TRIGGER IF NOT EXISTS jobs_fts_update AFTER UPDATE OF title, company ON jobs BEGIN
+    INSERT INTO jobs_fts(jobs_fts, rowid, title, company) VALUES ('delete', old.rowid, old.title, old.company);
+    INSERT INTO jobs_fts(rowid, title, company) VALUES (new.rowid, new.title, new.company);
+END;
+'''
+
+# Columns added after the first release, created on older databases
+MIGRATIONS = {
+    'added_run': 'ALTER TABLE jobs ADD COLUMN added_run INTEGER NOT NULL DEFAULT 0',
+    'updated_run': 'ALTER TABLE jobs ADD COLUMN updated_run INTEGER NOT NULL DEFAULT 0'
+}
+
+JOB_COLUMNS = 'id, company, title, location, url, scraped_from, roles'
+# A job row as a JSON object in the format of _row_to_job
+JOB_JSON = ("json_object('id', id, 'company', company, 'title', title, 'location', location, 'url', url, "
+            "'scraped_from', scraped_from, 'roles', json(roles))")
+
+
+def _row_to_job(row):
+    id_, company, title, location, url, scraped_from, roles = row
+    return {
+        'id': id_,
+        'company': company,
+        'title': title,
+        'location': location,
+        'url': url,
+        'scraped_from': scraped_from,
+        'roles': json.loads(roles)
+    }
+
+
+class JobStore:
+    """SQLite job storage shared by the scraper and the dashboard
+
+    Jobs live in one table with indexes on company and location and an FTS5
+    index over titles and companies (plain LIKE matching if this SQLite has no
+    FTS5). Every scrape is a run: a company's jobs are staged in a single
+    transaction, and finishing the run publishes the staged jobs and
+    deactivates the jobs it did not see in the same transaction that marks
+    it finished. The dashboard only serves active jobs, so it never sees a
+    half-written run.
+
+    For the scraper, a JobStore is a drop-in for output.JobStreamWriter:
+    begin_run() resumes an unfinished run, is_done()/write_company() checkpoint
+    per company, and finalize() exports the JSON and CSV outputs from the
+    database. Connections are per thread, in WAL mode so the dashboard can read
+    while the scraper writes.
+    """
+
+    def __init__(self, filename='a16z_jobs.db', json_filename='a16z_sde_jobs.json', csv_filename='a16z_sde_jobs.csv'):
+        self.filename = filename
+        self.json_filename = json_filename
+        self.csv_filename = csv_filename
+        self.run_id = None
+        self.company_counts = {}
+        self._local = threading.local()
+
+        conn = self._conn
+        conn.executescript(SCHEMA)
+        columns = {row[1] for row in conn.execute('PRAGMA table_info(jobs)')}
+        for column, statement in MIGRATIONS.items():
+            if column not in columns:
+                conn.execute(statement)
+        conn.commit()
+        try:
+            conn.executescript(FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            print("SQLite has no FTS5, falling back to LIKE search")
+            self.fts = False
+
+    @property
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = sqlite3.connect(self.filename, timeout=30)
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute('PRAGMA synchronous=NORMAL')
+            self._local.conn = conn
+        return conn
+
+    # Scraper side
+
+    def begin_run(self, resume=True):
+        """Start a run, or continue the last unfinished one if `resume`"""
+        conn = self._conn
+        row = conn.execute('SELECT id FROM runs WHERE finished_at IS NULL ORDER BY id DESC LIMIT 1').fetchone()
+        with conn:
+            if row and resume:
+                self.run_id = row[0]
+            else:
+                # Abandon unfinished runs along with the jobs they staged
+                conn.execute('DELETE FROM staged_jobs WHERE run_id IN '
+                             '(SELECT id FROM runs WHERE finished_at IS NULL)')
+                conn.execute('UPDATE runs SET finished_at = -1 WHERE finished_at IS NULL')
+                self.run_id = conn.execute('INSERT INTO runs (started_at) VALUES (?)', (time.time(),)).lastrowid
+
+        self.company_counts = dict(conn.execute(
+            'SELECT company, jobs FROM run_companies WHERE run_id = ?', (self.run_id,)
+        ))
+        if self.company_counts:
+            print(f"Resuming: {len(self.company_counts)} companies already scraped")
+        return self
+
+    def is_done(self, company):
+        """Whether this run already stored the company's jobs"""
+        return company in self.company_counts
+
+    def write_company(self, company, jobs):
+        """Stage a company's jobs for this run and checkpoint the company in one transaction"""
+        conn = self._conn
+        with conn:
+            conn.execute('DELETE FROM staged_jobs WHERE run_id = ? AND company = ?', (self.run_id, company))
+            conn.executemany('''
+                INSERT INTO staged_jobs (run_id, id, company, title, location, url, scraped_from, roles)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+            ''', [
+                (self.run_id, job.get('id') or job_id(job), job['company'], job['title'], job.get('location'),
+                 job.get('url'), job.get('scraped_from'), json.dumps(job.get('roles', [])))
+                for job in jobs
+            ])
+            conn.execute(
+                'INSERT OR REPLACE INTO run_companies (run_id, company, jobs) VALUES (?, ?, ?)',
+                (self.run_id, company, len(jobs))
+            )
+        self.company_counts[company] = len(jobs)
+
+    def _merge_staged(self, conn):
+        """Upsert this run's staged jobs into jobs, after the existing ones and in the order they were written"""
+        position = conn.execute('SELECT coalesce(max(position), 0) FROM jobs').fetchone()[0]
+        # A job that was inactive counts as added again; one whose fields
+        # changed is marked updated in this run
+        conn.execute('''
+            INSERT INTO jobs (id, company, title, location, url, scraped_from, roles,
+                              position, first_seen_run, last_seen_run, added_run, active)
+            SELECT id, company, title, location, url, scraped_from, roles, ? + seq, run_id, run_id, run_id, 1
+            FROM staged_jobs WHERE run_id = ? ORDER BY seq
+            ON CONFLICT(id) DO UPDATE SET
+                added_run = CASE WHEN jobs.active = 0 THEN excluded.added_run ELSE jobs.added_run END,
+                updated_run = CASE
+                    WHEN jobs.title IS NOT excluded.title OR jobs.location IS NOT excluded.location
+                      OR jobs.url IS NOT excluded.url OR jobs.roles IS NOT excluded.roles
+                    THEN excluded.last_seen_run ELSE jobs.updated_run END,
+                title = excluded.title,
+                location = excluded.location,
+                url = excluded.url,
+                scraped_from = excluded.scraped_from,
+                roles = excluded.roles,
+                position = excluded.position,
+                last_seen_run = excluded.last_seen_run,
+                active = 1
+        ''', (position, self.run_id))
+        conn.execute('DELETE FROM staged_jobs WHERE run_id = ?', (self.run_id,))
+
+    @staticmethod
+    def _jobs_json(condition):
+        """Subquery of the JSON array of the jobs matching `condition`, built by SQLite rather than in Python"""
+        return f'(SELECT json_group_array({JOB_JSON}) FROM (SELECT * FROM jobs WHERE {condition} ORDER BY position))'
+
+    def iter_jobs(self):
+        """Stream the active jobs in scrape order"""
+        cursor = self._conn.execute(f'SELECT {JOB_COLUMNS} FROM jobs WHERE active = 1 ORDER BY position')
+        for row in cursor:
+            yield _row_to_job(row)
+
+    @property
+    def total_jobs(self):
+        return sum(self.company_counts.values())
+
+    def finalize(self, keep_companies=()):
+        """Finish the run, record its changes and export the JSON and CSV outputs from the database
+
+        The staged jobs are published, and jobs not seen in this run are
+        deactivated, except those of `keep_companies` (companies that failed
+        to scrape this time). The change entry is assembled inside the
+        database, and only the last MAX_LOG_ENTRIES entries are kept.
+        """
+        conn = self._conn
+        stale = '''
+            active = 1 AND last_seen_run < ?
+            AND company NOT IN (SELECT value FROM json_each(?))
+        '''
+        stale_params = (self.run_id, json.dumps(sorted(keep_companies)))
+        with conn:
+            self._merge_staged(conn)
+            finished_at = time.time()
+            # Removed jobs are read before they are deactivated
+            conn.execute(f'''
+                INSERT OR REPLACE INTO changes (run_id, created_at, added, removed, updated)
+                VALUES (?, ?, {self._jobs_json('active = 1 AND added_run = ?')}, {self._jobs_json(stale)},
+                        {self._jobs_json('active = 1 AND updated_run = ? AND added_run < ?')})
+            ''', (self.run_id, finished_at, self.run_id) + stale_params + (self.run_id, self.run_id))
+            conn.execute(f'UPDATE jobs SET active = 0 WHERE {stale}', stale_params)
+            conn.execute('UPDATE runs SET finished_at = ? WHERE id = ?', (finished_at, self.run_id))
+            conn.execute('DELETE FROM changes WHERE run_id NOT IN '
+                         '(SELECT run_id FROM changes ORDER BY run_id DESC LIMIT ?)', (MAX_LOG_ENTRIES,))
+        added, removed, updated = conn.execute(
+            'SELECT json_array_length(added), json_array_length(removed), json_array_length(updated) '
+            'FROM changes WHERE run_id = ?', (self.run_id,)
+        ).fetchone()
+        print(f"\nChanges in run {self.run_id}: {added} added, {removed} removed, {updated} updated")
+
+        count = write_json_atomic(self.json_filename, self.iter_jobs())
+        print(f"\nSaved {count} jobs to {self.json_filename}")
+        if write_csv_atomic(self.csv_filename, self.iter_jobs()):
+            print(f"Saved {count} jobs to {self.csv_filename}")
+        else:
+            print("No jobs to save")
+        return count
+
+    # Dashboard side
+
+    def data_version(self):
+        """Id of the last finished run; the served data changes when it does"""
+        row = self._conn.execute('SELECT max(id) FROM runs WHERE finished_at > 0').fetchone()
+        return row[0]
+
+    def changes_version(self):
+        """Version (run id) of the latest change entry, 0 if none was recorded"""
+        return self._conn.execute('SELECT coalesce(max(run_id), 0) FROM changes').fetchone()[0]
+
+    def changes_since(self, since, until=None):
+        """Change entries after version `since` and up to `until`, in the changes.changes_since() format
+
+        Only the entries a client is missing are read from the database.
+        Versions are run ids; each entry's `previous` is the finished run
+        before it, since abandoned runs leave gaps between them.
+        """
+        conn = self._conn
+        latest = until if until is not None else self.changes_version()
+        oldest = conn.execute('''
+            SELECT coalesce(max(id), 0) FROM runs
+            WHERE finished_at > 0 AND id < (SELECT min(run_id) FROM changes)
+        ''').fetchone()[0]
+        if since < oldest or since > latest:
+            return {'version': latest, 'reset': True, 'changes': []}
+
+        rows = conn.execute('''
+            SELECT run_id, (SELECT coalesce(max(id), 0) FROM runs WHERE finished_at > 0 AND id < run_id),
+                   created_at, added, removed, updated
+            FROM changes WHERE run_id > ? AND run_id <= ? ORDER BY run_id
+        ''', (since, latest))
+        return {
+            'version': latest,
+            'reset': False,
+            'changes': [
+                {'version': run_id, 'previous': previous, 'timestamp': created_at, 'added': json.loads(added),
+                 'removed': json.loads(removed), 'updated': json.loads(updated)}
+                for run_id, previous, created_at, added, removed, updated in rows
+            ]
+        }
+
+    def run_finished_at(self, run_id):
+        """Unix time a run finished at"""
+        return self._conn.execute('SELECT finished_at FROM runs WHERE id = ?', (run_id,)).fetchone()[0]
+
+    def stats(self):
+        """Summary statistics of the active jobs"""
+        total_jobs, total_companies, total_locations = self._conn.execute(
+            'SELECT count(*), count(DISTINCT company), count(DISTINCT location) FROM jobs WHERE active = 1'
+        ).fetchone()
+        return {'total_jobs': total_jobs, 'total_companies': total_companies, 'total_locations': total_locations}
+
+    def filters(self):
+        """Distinct companies and locations of the active jobs"""
+        conn = self._conn
+        return {
+            'companies': [row[0] for row in conn.execute(
+                'SELECT DISTINCT company FROM jobs WHERE active = 1 ORDER BY company')],
+            'locations': [row[0] for row in conn.execute(
+                'SELECT DISTINCT location FROM jobs WHERE active = 1 AND location IS NOT NULL ORDER BY location')]
+        }
+
+    def query(self, q=None, company=None, location=None, offset=0, limit=50):
+        """One page of matching active jobs with the total match count, like JobsIndex.query"""
+        where = ['active = 1']
+        params = []
+        if company:
+            where.append('company = ?')
+            params.append(company)
+        if location:
+            where.append('location = ?')
+            params.append(location)
+
+        tokens = tokenize(q or '')
+        if tokens and self.fts:
+            # Every token must prefix-match a title or company token
+            where.append('rowid IN (SELECT rowid FROM jobs_fts WHERE jobs_fts MATCH ?)')
+            params.append(' AND '.join(f'"{token}"*' for token in tokens))
+        else:
+            for token in tokens:
+                where.append("(title LIKE ? ESCAPE '\\' OR company LIKE ? ESCAPE '\\')")
+                pattern = '%' + token.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+                params.extend([pattern, pattern])
+
+        conn = self._conn
+        condition = ' AND '.join(where)
+        total = conn.execute(f'SELECT count(*) FROM jobs WHERE {condition}', params).fetchone()[0]
+        rows = conn.execute(
+            f'SELECT {JOB_COLUMNS} FROM jobs WHERE {condition} ORDER BY position LIMIT ? OFFSET ?',
+            params + [limit, offset]
+        )
+        next_offset = offset + limit
+        return {
+            'jobs': [_row_to_job(row) for row in rows],
+            'total': total,
+            'offset': offset,
+            'page': offset // limit + 1,
+            'limit': limit,
+            'next_cursor': str(next_offset) if next_offset < total else None
+        }
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
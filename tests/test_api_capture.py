@@ -0,0 +1,57 @@
+"""Round trip from a captured endpoint to the listings fetched from it"""
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from api_capture import endpoint_spec, fetch_listings
+
+
+class FakeResponse:
+    def __init__(self, data):
+        self.data = data
+
+    def json(self):
+        return self.data
+
+
+def fake_api(pages):
+    """A `fetch` that answers from {url: decoded JSON} and records the URLs it was asked for"""
+    calls = []
+
+    def fetch(url, headers):
+        calls.append(url)
+        return FakeResponse(pages[url]) if url in pages else None
+    return fetch, calls
+
+
+def test_endpoint_spec_round_trips_through_fetch_listings():
+    records = [{'title': 'Software Engineer', 'location': 'NYC', 'url': '/jobs/1'},
+               {'title': 'Software Engineer', 'location': 'Remote'}]
+    spec = endpoint_spec('https://api.acme.com/v1/boards/acme/jobs?page=2', 'acme', ('data', 'jobs'), records)
+    assert spec['template'] == 'https://api.acme.com/v1/boards/{company}/jobs?page=1'
+    assert spec['records_path'] == ['data', 'jobs']
+
+    other = [{'title': 'Backend Engineer', 'location': 'SF', 'url': '/jobs/7'},
+             {'title': 'Backend Engineer', 'location': 'SF'},
+             {'title': 'Backend Engineer', 'location': 'Austin'}]
+    fetch, calls = fake_api({
+        'https://api.acme.com/v1/boards/globex/jobs?page=1': {'total': 3, 'data': {'jobs': other}}
+    })
+    listings = fetch_listings(fetch, spec, 'globex')
+
+    assert calls == ['https://api.acme.com/v1/boards/globex/jobs?page=1']
+    assert [(listing.title, listing.location, listing.href) for listing in listings] == [
+        ('Backend Engineer', 'SF', 'https://api.acme.com/jobs/7'),
+        ('Backend Engineer', 'SF', None),
+        ('Backend Engineer', 'Austin', None)
+    ]
+
+
+def test_fetch_listings_falls_back_on_partial_pages():
+    spec = endpoint_spec('https://api.acme.com/jobs?company=acme&page=1', 'acme', ('jobs',),
+                         [{'title': 'Engineer'}])
+    fetch, _ = fake_api({
+        'https://api.acme.com/jobs?company=globex&page=1': {'total': 2, 'jobs': [{'title': 'Engineer', 'id': 1}]}
+    })
+    assert fetch_listings(fetch, spec, 'globex') is None
@@ -0,0 +1,243 @@
+import json
+import os
+import socket
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+
+SCHEMA = '''
+-- One row per coordinator run; workers take companies from the latest one
+CREATE TABLE IF NOT EXISTS crawls (
+    id INTEGER PRIMARY KEY,
+    created_at REAL NOT NULL,
+    merged_at REAL
+);
+
+-- state is pending, leased, done or failed. A leased task whose lease has
+-- expired (its worker stopped heartbeating) is up for grabs again.
+CREATE TABLE IF NOT EXISTS tasks (
+    crawl_id INTEGER NOT NULL REFERENCES crawls(id),
+    company TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    state TEXT NOT NULL DEFAULT 'pending',
+    worker TEXT,
+    lease_expires REAL,
+    attempts INTEGER NOT NULL DEFAULT 0,
+    jobs TEXT,
+    error TEXT,
+    finished_at REAL,
+    PRIMARY KEY (crawl_id, company)
+);
+CREATE INDEX IF NOT EXISTS idx_tasks_state ON tasks(crawl_id, state, position);
+'''
+
+
+def worker_name():
+    """A name for this process that is unique across hosts sharing a queue"""
+    return f"{socket.gethostname()}-{os.getpid()}"
+
+
+class WorkQueue:
+    """Durable queue of companies to scrape, shared by worker processes through a SQLite file
+
+    A coordinator enqueues the company list as a new crawl. Workers, on this
+    host or others with the file on shared storage, lease one company at a
+    time and heartbeat while they scrape it. A worker that crashes stops
+    heartbeating, its lease expires, and the company goes to the next
+    worker that asks; after `max_attempts` leases it is marked failed.
+    Completed companies keep their jobs in the queue until a merge builds
+    the outputs from them.
+
+    Uses SQLite's rollback journal rather than WAL, since WAL needs shared
+    memory and does not work across hosts on network filesystems. Leases
+    are taken in IMMEDIATE transactions, so two workers never get the same
+    company.
+    """
+
+    def __init__(self, filename='a16z_queue.db', lease_seconds=120, max_attempts=3):
+        self.filename = filename
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self._local = threading.local()
+        self._conn.executescript(SCHEMA)
+
+    @property
+    def _conn(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            # Autocommit mode, transactions are begun explicitly
+            conn = sqlite3.connect(self.filename, timeout=60, isolation_level=None)
+            self._local.conn = conn
+        return conn
+
+    @contextmanager
+    def _transaction(self):
+        """A write transaction that takes the database lock up front"""
+        conn = self._conn
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            yield conn
+        except BaseException:
+            conn.execute('ROLLBACK')
+            raise
+        conn.execute('COMMIT')
+
+    def crawl_id(self):
+        """The latest crawl, or None before the first enqueue()"""
+        row = self._conn.execute('SELECT MAX(id) FROM crawls').fetchone()
+        return row[0]
+
+    # Coordinator side
+
+    def enqueue(self, companies):
+        """Start a crawl of `companies`, in order; returns its id"""
+        with self._transaction() as conn:
+            crawl_id = conn.execute('INSERT INTO crawls (created_at) VALUES (?)', (time.time(),)).lastrowid
+            conn.executemany(
+                'INSERT OR IGNORE INTO tasks (crawl_id, company, position) VALUES (?, ?, ?)',
+                [(crawl_id, company, position) for position, company in enumerate(companies)]
+            )
+        return crawl_id
+
+    def progress(self, crawl_id=None):
+        """Task counts of a crawl by state"""
+        crawl_id = crawl_id or self.crawl_id()
+        counts = dict.fromkeys(('pending', 'leased', 'done', 'failed'), 0)
+        counts.update(self._conn.execute(
+            'SELECT state, COUNT(*) FROM tasks WHERE crawl_id = ? GROUP BY state', (crawl_id,)
+        ))
+        return counts
+
+    # Worker side
+
+    def lease(self, worker):
+        """Lease the next company of the latest crawl to `worker`, or return None if nothing is left to lease
+
+        Expired leases are taken over; companies that used up their
+        attempts are marked failed instead.
+        """
+        now = time.time()
+        with self._transaction() as conn:
+            crawl_id = conn.execute('SELECT MAX(id) FROM crawls').fetchone()[0]
+            conn.execute('''
+                UPDATE tasks SET state = 'failed', error = 'lease expired too many times', finished_at = ?
+                WHERE crawl_id = ? AND state = 'leased' AND lease_expires < ? AND attempts >= ?
+            ''', (now, crawl_id, now, self.max_attempts))
+            row = conn.execute('''
+                SELECT company FROM tasks
+                WHERE crawl_id = ? AND (state = 'pending' OR (state = 'leased' AND lease_expires < ?))
+                ORDER BY position LIMIT 1
+            ''', (crawl_id, now)).fetchone()
+            if row is not None:
+                conn.execute('''
+                    UPDATE tasks SET state = 'leased', worker = ?, lease_expires = ?, attempts = attempts + 1
+                    WHERE crawl_id = ? AND company = ?
+                ''', (worker, now + self.lease_seconds, crawl_id, row[0]))
+        return row[0] if row is not None else None
+
+    def heartbeat(self, worker, companies):
+        """Extend `worker`'s leases on `companies`; returns the companies whose lease it still holds"""
+        if not companies:
+            return []
+        crawl_id = self.crawl_id()
+        held = []
+        with self._transaction() as conn:
+            for company in companies:
+                cursor = conn.execute('''
+                    UPDATE tasks SET lease_expires = ?
+                    WHERE crawl_id = ? AND company = ? AND state = 'leased' AND worker = ?
+                ''', (time.time() + self.lease_seconds, crawl_id, company, worker))
+                if cursor.rowcount:
+                    held.append(company)
+        return held
+
+    def complete(self, worker, company, jobs):
+        """Store a leased company's jobs; returns False if the lease was lost to another worker meanwhile"""
+        return self._finish(worker, company, 'done', jobs=json.dumps(jobs, ensure_ascii=False))
+
+    def fail(self, worker, company, error):
+        """Give a leased company back to the queue, or mark it failed once it used up its attempts"""
+        row = self._conn.execute('SELECT attempts FROM tasks WHERE crawl_id = ? AND company = ?',
+                                 (self.crawl_id(), company)).fetchone()
+        state = 'failed' if row and row[0] >= self.max_attempts else 'pending'
+        return self._finish(worker, company, state, error=str(error))
+
+    def _finish(self, worker, company, state, jobs=None, error=None):
+        with self._transaction() as conn:
+            cursor = conn.execute('''
+                UPDATE tasks SET state = ?, jobs = ?, error = ?, worker = NULL, lease_expires = NULL,
+                                 finished_at = CASE WHEN ? = 'pending' THEN NULL ELSE ? END
+                WHERE crawl_id = ? AND company = ? AND state = 'leased' AND worker = ?
+            ''', (state, jobs, error, state, time.time(), self.crawl_id(), company, worker))
+        return cursor.rowcount == 1
+
+    # Merge side
+
+    def results(self, crawl_id=None):
+        """(company, jobs) of the crawl's completed companies, in company-list order"""
+        crawl_id = crawl_id or self.crawl_id()
+        for company, jobs in self._conn.execute(
+                "SELECT company, jobs FROM tasks WHERE crawl_id = ? AND state = 'done' ORDER BY position", (crawl_id,)):
+            yield company, json.loads(jobs)
+
+    def unfinished(self, crawl_id=None):
+        """Companies of the crawl that did not complete, in company-list order"""
+        crawl_id = crawl_id or self.crawl_id()
+        return [company for company, in self._conn.execute(
+            "SELECT company FROM tasks WHERE crawl_id = ? AND state != 'done' ORDER BY position", (crawl_id,))]
+
+    def mark_merged(self, crawl_id=None):
+        with self._transaction() as conn:
+            conn.execute('UPDATE crawls SET merged_at = ? WHERE id = ?', (time.time(), crawl_id or self.crawl_id()))
+
+    def close(self):
+        conn = getattr(self._local, 'conn', None)
+        if conn is not None:
+            conn.close()
+            self._local.conn = None
+
+
+class LeaseKeeper:
+    """Background thread heartbeating the leases a worker process holds
+
+    Beats every third of the lease time, so one missed beat does not lose a
+    lease. Leases lost anyway (e.g. after a long pause) are reported, and
+    complete() will refuse them.
+    """
+
+    def __init__(self, queue, worker):
+        self.queue = queue
+        self.worker = worker
+        self._companies = set()
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def add(self, company):
+        with self._lock:
+            self._companies.add(company)
+
+    def remove(self, company):
+        with self._lock:
+            self._companies.discard(company)
+
+    def _run(self):
+        while not self._stop.wait(self.queue.lease_seconds / 3):
+            with self._lock:
+                companies = sorted(self._companies)
+            try:
+                held = self.queue.heartbeat(self.worker, companies)
+            except sqlite3.Error as e:
+                print(f"  Heartbeat failed: {e}")
+                continue
+            for company in set(companies) - set(held):
+                print(f"  Lost the lease on {company} to another worker")
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()